@@ -1,2 +1,6 @@
 from .address import Address
-from .address_parser import AddressParser, DSTKAddressParser
+from .address_parser import AddressParser, DSTKAddressParser, ParseResult
+from .gazetteer import Gazetteer
+from .result import ParsedAddress
+from .units import UnitExtractor, extract_unit
+from .zipcodes import ZipTable
@@ -5,13 +5,14 @@ import re
 import csv
 import os
 import dstk
+import enrich
+import geocode
 import sys
-
-# Keep lowercase, no periods
-# Requires numbers first, then option dash plus numbers.
-street_num_regex = r'^(\d+)([-/]?)(\d*)$'
+from result import ParsedAddress, format_address
+from tokenizer import as_token, tokenize, street_num_regex, ZIP, NUMERIC, HOUSE_NUMBER, UNIT_MARKER
 
 apartment_regex_number = r'(#?)(\d*)(\w*)'
+letter_regex = re.compile(r"[A-Za-z]")
 cwd = os.path.dirname(os.path.realpath(__file__))
 
 
@@ -39,6 +40,14 @@ class Address(object):
     line_number = -1
     # Confidence value from DSTK. 0 - 1, -1 for not set.
     confidence = -1
+    # (field, text matched, corrected to, edit distance) for every field corrected by a fuzzy match.
+    fuzzy_matches = ()
+    # Fields filled in from the zip, and fields that don't match the zip, when the parser enriches. See the enrich
+    # module.
+    enriched = ()
+    zip_mismatch = ()
+    # Where lat and lng came from: "street" for dstk, "zip" or "city" for a geocoding parser, see the geocode module.
+    geocode_precision = None
 
     # Cache the zip lookup db.
     zips = None
@@ -66,6 +75,10 @@ class Address(object):
             raise InvalidAddressException("Addresses must have house numbers.")
         elif self.street is None or self.street == "":
             raise InvalidAddressException("Addresses must have streets.")
+        if parser.enrich:
+            enrich.enrich_address(self, parser.zips, parser.place_index)
+        if parser.geocode:
+            geocode.geocode_address(self, parser.zips, parser.place_index)
             # if self.house_number is None or self.street is None or self.street_suffix is None:
             # raise ValueError("Street addresses require house_number, street, and street_suffix")
 
@@ -78,32 +91,46 @@ class Address(object):
         address = address.strip().replace('.', '')
         # We'll use this for guessing.
         self.comma_separated_address = address.split(',')
-        address = address.replace(',', '')
 
         # First, do some preprocessing
         # address = self.preprocess_address(address)
 
+        # Split into classified tokens, remembering where each comma separated segment starts so multi word cities
+        # don't get matched across a comma.
+        tokens, segment_starts = tokenize(self.comma_separated_address)
+        words = [token.lower for token in tokens]
+
         # Try all our address regexes. USPS says parse from the back.
-        address = reversed(address.split())
         # Save unmatched to process after the rest is processed.
         unmatched = []
         # Use for contextual data
-        for token in address:
-        #            print token, self
+        i = len(tokens) - 1
+        while i >= 0:
+            token = tokens[i]
+            #            print token, self
             # Check zip code first
             if self.check_zip(token):
+                i -= 1
                 continue
             if self.check_state(token):
+                i -= 1
                 continue
-            if self.check_city(token):
+            # Cities can be several tokens long, skip all of them.
+            city_length = self.check_city(token, words, i, segment_starts[i])
+            if city_length:
+                i -= city_length
                 continue
+            i -= 1
             if self.check_street_suffix(token):
                 continue
             if self.check_house_number(token):
                 continue
             if self.check_street_prefix(token):
                 continue
-            if self.check_street(token):
+            # Streets from the street list can be several tokens long, skip all of them.
+            street_length = self.check_street(token, tokens, i + 1, segment_starts[i + 1])
+            if street_length:
+                i -= street_length - 1
                 continue
                 # if self.check_building(token):
             #     continue
@@ -121,34 +148,24 @@ class Address(object):
             #            print "Original address: ", self.original
             self.unmatched = True
 
+        self.correct_street()
+
     def preprocess_address(self, address):
         """
         Takes a basic address and attempts to clean it up, extract reasonably assured bits that may throw off the
         rest of the parsing, and return the cleaned address.
         """
-        # Run some basic cleaning
-        address = address.replace("# ", "#")
-        address = address.replace(" & ", "&")
-        # Clear the address of things like 'X units', which shouldn't be in an address anyway. We won't save this for now.
-        if re.search(r"-?-?\w+ units", address, re.IGNORECASE):
-            address = re.sub(r"-?-?\w+ units", "", address, flags=re.IGNORECASE)
-            # Sometimes buildings are put in parantheses.
+        # Sometimes buildings are put in parantheses.
         # building_match = re.search(r"\(.*\)", address, re.IGNORECASE)
         # if building_match:
         #     self.building = self._clean(building_match.group().replace('(', '').replace(')', ''))
         #     address = re.sub(r"\(.*\)", "", address, flags=re.IGNORECASE)
-        # Now let's get the apartment stuff out of the way. Using only sure match regexes, delete apartment parts from
-        # the address. This prevents things like "Unit" being the street name.
-        apartment_regexes = [r'#\w+ & \w+', '#\w+ rm \w+', "#\w+-\w", r'apt #{0,1}\w+', r'apartment #{0,1}\w+', r'#\w+',
-                             r'# \w+', r'rm \w+', r'unit #?\w+', r'units #?\w+', r'- #{0,1}\w+', r'no\s?\d+\w*',
-                             r'style\s\w{1,2}', r'townhouse style\s\w{1,2}']
-        for regex in apartment_regexes:
-            apartment_match = re.search(regex, address, re.IGNORECASE)
-            if apartment_match:
-            #                print "Matched regex: ", regex, apartment_match.group()
-                self.apartment = self._clean(apartment_match.group())
-                address = re.sub(regex, "", address, flags=re.IGNORECASE)
-            # Now check for things like ",  ," which throw off dstk
+        # Clear the address of things like 'X units', then get the apartment stuff out of the way. Using only sure
+        # match regexes, delete apartment parts from the address. This prevents things like "Unit" being the street name.
+        address, apartment = self.parser.unit_extractor.extract(address)
+        if apartment is not None:
+            self.apartment = self._clean(apartment)
+        # Now check for things like ",  ," which throw off dstk
         address = re.sub(r"\,\s*\,", ",", address)
         return address
 
@@ -161,9 +178,9 @@ class Address(object):
             # print "last matched", self.last_matched
             if self.last_matched is not None:
                 return False
-                # print "zip check", len(token) == 5, re.match(r"\d{5}", token)
-            if re.match(r"\d{5}(-?\d{0,4})?", token):
-                self.zip = self._clean(token)
+            token = as_token(token)
+            if token.kind & ZIP:
+                self.zip = self._clean(token.text)
                 return True
 
         return False
@@ -173,79 +190,75 @@ class Address(object):
         Check if state is in either the keys or values of our states list. Must come before the suffix.
         """
         # print "zip", self.zip
-        if len(token) == 2 and self.state is None:
-            if token.capitalize() in self.parser.states.keys():
-                self.state = self._clean(self.parser.states[token.capitalize()])
-                return True
-            elif token.upper() in self.parser.states.values():
-                self.state = self._clean(token.upper())
-                return True
-        if self.state is None and self.street_suffix is None and len(self.comma_separated_address) > 1:
-            if token.capitalize() in self.parser.states.keys():
-                self.state = self._clean(self.parser.states[token.capitalize()])
-                return True
-            elif token.upper() in self.parser.states.values():
-                self.state = self._clean(token.upper())
+        if self.state is not None:
+            return False
+        token = as_token(token)
+        # No state name or abbreviation has digits in it.
+        if token.kind & NUMERIC:
+            return False
+        if len(token) == 2 or (self.street_suffix is None and len(self.comma_separated_address) > 1):
+            state = self.parser.state_map.get(token.upper)
+            if state is not None:
+                self.state = self._clean(state)
                 return True
         return False
 
-    def check_city(self, token):
+    def check_city(self, token, words=None, end=None, start=0):
         """
         Check if there is a known city from our city list. Must come before the suffix.
+
+        words is the lowercased token list the token came from, with the token at index end. Multi word cities are
+        found by walking the city trie backwards from end, never past start, and the longest city wins. Returns the
+        number of tokens making up the city, or 0 if there is no city here.
         """
-        shortened_cities = {'saint': 'st.'}
+        if words is None:
+            words = [as_token(token).lower]
+            end = 0
         if self.city is None and self.state is not None and self.street_suffix is None:
-            if token.lower() in self.parser.cities:
-                self.city = self._clean(token.capitalize())
-                return True
-            return False
+            return self._match_city(words, end, start)
             # Check that we're in the correct location, and that we have at least one comma in the address
         if self.city is None and self.apartment is None and self.street_suffix is None and len(
                 self.comma_separated_address) > 1:
-            if token.lower() in self.parser.cities:
-                self.city = self._clean(token.capitalize())
-                return True
-            return False
-        # Multi word cities
-        if self.city is not None and self.street_suffix is None and self.street is None:
-            #print "Checking for multi part city", token.lower(), token.lower() in shortened_cities.keys()
-            if token.lower() + ' ' + self.city in self.parser.cities:
-                self.city = self._clean((token.lower() + ' ' + self.city).capitalize())
-                return True
-            if token.lower() in shortened_cities.keys():
-                token = shortened_cities[token.lower()]
-                #print "Checking for shorted multi part city", token.lower() + ' ' + self.city
-                if token.lower() + ' ' + self.city.lower() in self.parser.cities:
-                    self.city = self._clean(token.capitalize() + ' ' + self.city.capitalize())
-                    return True
+            return self._match_city(words, end, start)
+        return 0
+
+    def _match_city(self, words, end, start):
+        first, city = self.parser.cities.match_tail(words, end, start)
+        if city is None:
+            if not self.parser.fuzzy_cities:
+                return 0
+            # Fall back to the closest city within parser.fuzzy_cities typos.
+            first, city, distance = self.parser.cities.fuzzy_match_tail(words, end, start, self.parser.fuzzy_cities,
+                                                                        self.parser.fuzzy_max_entries)
+            if city is None:
+                return 0
+            self._fuzzy_match('city', ' '.join(words[first:end + 1]), city, distance)
+        self.city = self._clean(' '.join(word.capitalize() for word in city.split()))
+        return end - first + 1
 
     def check_apartment_number(self, token):
         """
         Finds apartment, unit, #, etc, regardless of spot in string. This needs to come after everything else has been ruled out,
         because it has a lot of false positives.
         """
-        apartment_regexes = [r'#\w+ & \w+', '#\w+ rm \w+', "#\w+-\w", r'apt #{0,1}\w+', r'apartment #{0,1}\w+', r'#\w+',
-                             r'# \w+', r'rm \w+', r'unit #?\w+', r'units #?\w+', r'- #{0,1}\w+', r'no\s?\d+\w*',
-                             r'style\s\w{1,2}', r'\d{1,4}/\d{1,4}', r'\d{1,4}', r'\w{1,2}']
-        for regex in apartment_regexes:
-            if re.match(regex, token.lower()):
-                self.apartment = self._clean(token)
-                return True
+        token = as_token(token)
+        if self.parser.unit_extractor.is_unit_token(token.text):
+            self.apartment = self._clean(token.text)
+            return True
             #        if self.apartment is None and re.match(apartment_regex_number, token.lower()):
             ##            print "Apt regex"
             #            self.apartment = token
             #            return True
             ## If we come on apt or apartment and already have an apartment number, add apt or apartment to the front
-        if self.apartment and token.lower() in ['apt', 'apartment']:
+        if self.apartment and token.kind & UNIT_MARKER:
         #            print "Apt in a_n"
-            self.apartment = self._clean(token + ' ' + self.apartment)
+            self.apartment = self._clean(token.text + ' ' + self.apartment)
             return True
 
         if not self.street_suffix and not self.street and not self.apartment:
-        #            print "Searching for unmatched term: ", token, token.lower(),
-            if re.match(r'\d?\w?', token.lower()):
-                self.apartment = self._clean(token)
-                return True
+            # This used to check re.match(r'\d?\w?', token), which matches any token.
+            self.apartment = self._clean(token.text)
+            return True
         return False
 
     def check_street_suffix(self, token):
@@ -256,44 +269,90 @@ class Address(object):
         # Suffix must come before street
         # print "Suffix check", token, "suffix", self.street_suffix, "street", self.street
         if self.street_suffix is None and self.street is None:
-            # print "upper", token.upper()
-            if token.upper() in self.parser.suffixes.keys():
-                suffix = self.parser.suffixes[token.upper()]
+            suffix = self.parser.suffix_map.get(as_token(token).upper)
+            if suffix is not None:
                 self.street_suffix = self._clean(suffix.capitalize() + '.')
                 return True
-            elif token.upper() in self.parser.suffixes.values():
-                self.street_suffix = self._clean(token.capitalize() + '.')
-                return True
         return False
 
-    def check_street(self, token):
+    def check_street(self, token, tokens=None, end=None, start=0):
         """
         Let's assume a street comes before a prefix and after a suffix. This isn't always the case, but we'll deal
         with that in our guessing game. Also, two word street names...well...
 
         This check must come after the checks for house_number and street_prefix to help us deal with multi word streets.
+
+        Without a suffix, the parser's street list is used instead. tokens is the token list the token came from, with
+        the token at index end, and the longest street in the list ending there wins, never starting before start.
+        Returns the number of tokens making up the street, or 0 if there is no street here.
         """
+        token = as_token(token)
         # First check for single word streets between a prefix and a suffix
         if self.street is None and self.street_suffix is not None and self.street_prefix is None and self.house_number is None:
-            self.street = self._clean(token.capitalize())
-            return True
+            self.street = self._clean(token.capitalized)
+            return 1
         # Now check for multiple word streets. This check must come after the check for street_prefix and house_number for this reason.
         elif self.street is not None and self.street_suffix is not None and self.street_prefix is None and self.house_number is None:
-            self.street = self._clean(token.capitalize() + ' ' + self.street)
-            return True
-        if not self.street_suffix and not self.street and token.lower() in self.parser.streets:
-            self.street = self._clean(token)
+            self.street = self._clean(token.capitalized + ' ' + self.street)
+            return 1
+        if not self.street_suffix and not self.street and self.parser.street_index:
+            if tokens is None:
+                tokens = [token]
+                end = 0
+            return self._match_street(tokens, end, start)
+        return 0
+
+    def _match_street(self, tokens, end, start):
+        index = self.parser.street_index
+        words = [token.lower for token in tokens]
+        first, street = index.match_tail(words, end, start)
+        if street is not None:
+            self.street = self._clean(' '.join(token.text for token in tokens[first:end + 1]))
+            return end - first + 1
+        if not self.parser.fuzzy_streets:
+            return 0
+        first, street, distance = index.fuzzy_match_tail(words, end, start, self.parser.fuzzy_streets,
+                                                         self.parser.fuzzy_max_entries)
+        if street is None:
+            return 0
+        self._fuzzy_match('street', ' '.join(token.text for token in tokens[first:end + 1]), street, distance)
+        self.street = self._clean(' '.join(word.capitalize() for word in street.split()))
+        return end - first + 1
+
+    def correct_street(self):
+        """
+        Check the street against the parser's street list, if it has one. A street that isn't in the list is replaced
+        by the closest street within parser.fuzzy_streets edits. Returns True if the street is in the list, after any
+        correction.
+        """
+        index = self.parser.street_index
+        if not self.street or not index:
+            return False
+        if self.street.lower() in index:
             return True
-        return False
+        if not self.parser.fuzzy_streets:
+            return False
+        fuzzy_index = index.fuzzy_index(self.parser.fuzzy_streets, self.parser.fuzzy_max_entries)
+        street, distance = fuzzy_index.lookup(self.street, self.parser.fuzzy_streets)
+        if street is None:
+            return False
+        self._fuzzy_match('street', self.street, street, distance)
+        self.street = self._clean(' '.join(word.capitalize() for word in street.split()))
+        return True
+
+    def _fuzzy_match(self, field, written, corrected, distance):
+        self.fuzzy_matches = self.fuzzy_matches + ((field, written, corrected, distance),)
 
     def check_street_prefix(self, token):
         """
         Finds street prefixes, such as N. or Northwest, before a street name. Standardizes to 1 or two letters, followed
         by a period.
         """
-        if self.street and not self.street_prefix and token.lower().replace('.', '') in self.parser.prefixes.keys():
-            self.street_prefix = self._clean(self.parser.prefixes[token.lower().replace('.', '')])
-            return True
+        if self.street and not self.street_prefix:
+            prefix = self.parser.prefix_map.get(as_token(token).lower)
+            if prefix is not None:
+                self.street_prefix = self._clean(prefix)
+                return True
         return False
 
     def check_house_number(self, token):
@@ -301,7 +360,11 @@ class Address(object):
         Attempts to find a house number, generally the first thing in an address. If anything is in front of it,
         we assume it is a building name.
         """
-        if self.street and self.house_number is None and re.match(street_num_regex, token.lower()):
+        if not self.street or self.house_number is not None:
+            return False
+        token = as_token(token)
+        if token.kind & HOUSE_NUMBER:
+            token = token.text
             if '/' in token:
                 token = token.split('/')[0]
             if '-' in token:
@@ -316,6 +379,7 @@ class Address(object):
         Allows for multi word building names.
         """
         if self.street and self.house_number:
+            token = as_token(token).text
             if not self.building:
                 self.building = self._clean(token)
             else:
@@ -327,11 +391,12 @@ class Address(object):
         """
         When we find something that doesn't match, we can make an educated guess and log it as such.
         """
+        token = as_token(token)
         # Check if this is probably an apartment:
-        if token.lower() in ['apt', 'apartment']:
+        if token.kind & UNIT_MARKER:
             return False
             # Stray dashes are likely useless
-        if token.strip() == '-':
+        if token.text.strip() == '-':
             return True
             # Almost definitely not a street if it is one or two characters long.
         if len(token) <= 2:
@@ -339,14 +404,14 @@ class Address(object):
             # Let's check for a suffix-less street.
         if self.street_suffix is None and self.street is None and self.street_prefix is None and self.house_number is None:
             # Streets will just be letters
-            if re.match(r"[A-Za-z]", token):
+            if letter_regex.match(token.text):
                 if self.line_number >= 0:
                     pass
                 #                    print "{0}: Guessing suffix-less street: ".format(self.line_number), token
                 else:
                 #                    print "Guessing suffix-less street: ", token
                     pass
-                self.street = self._clean(token.capitalize())
+                self.street = self._clean(token.capitalized)
                 return True
         return False
 
@@ -354,38 +419,48 @@ class Address(object):
         """
         Print the address in a human readable format
         """
-        addr = ""
-        # if self.building:
-        #     addr = addr + "(" + self.building + ") "
-        if self.house_number:
-            addr = addr + self.house_number
-        if self.street_prefix:
-            addr = addr + " " + self.street_prefix
-        if self.street:
-            addr = addr + " " + self.street
-        if self.street_suffix:
-            addr = addr + " " + self.street_suffix
-        if self.apartment:
-            addr = addr + " " + self.apartment
-        if self.city:
-            addr = addr + ", " + self.city
-        if self.state:
-            addr = addr + ", " + self.state
-        if self.zip:
-            addr = addr + " " + self.zip
-        return addr
+        return format_address(self)
+
+    def to_result(self):
+        """
+        Return the parsed fields as a ParsedAddress, which is much smaller than an Address and cheap to pickle.
+        """
+        return ParsedAddress.from_address(self)
+
+    @classmethod
+    def from_result(cls, result, parser=None, logger=None):
+        """
+        Build an Address from a ParsedAddress without parsing again, e.g. to get the Address methods back for a
+        result that came from another process.
+        """
+        address = cls(None, parser, result.line_number, logger)
+        for name in ParsedAddress.FIELDS:
+            setattr(address, name, getattr(result, name))
+        return address
 
     def zip_info(self, zip):
         """
         Given a zip, find the info from zipcode.csv, which is cached in self.parser. Only uses the first
         5 digits of the zip. Returns either a dict with the zip info (zip, city, state, lat, lng, timezone,
-        dst) or None if not found in the file.
+        dst) or None if not found in the file. lat and lng are floats, timezone is an int and dst is a bool.
         """
         try:
             return self.parser.zips[zip[0:5]]
         except KeyError:
             return None
 
+    def __getstate__(self):
+        # The parser and logger stay behind when an Address is pickled, e.g. to send it between processes.
+        state = self.__dict__.copy()
+        state.pop('parser', None)
+        state.pop('logger', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.parser = None
+        self.logger = None
+
     def __repr__(self):
         return unicode(self)
 
@@ -418,8 +493,11 @@ class Address(object):
             dstk_address = pre_parsed_address
         else:
             if self.logger: self.logger.debug("Asking DSTK for address parse {0}".format(address.encode("ascii", "ignore")))
-            dstk_address = parser.dstk.street2coordinates(address)
+            # street2coordinates returns a dict of every address it was sent to its result.
+            dstk_address = parser.dstk.street2coordinates(address).get(address)
             # if self.logger: self.logger.debug("dstk return: {0}".format(dstk_address))
+        if dstk_address is None:
+            raise InvalidAddressException("DSTK could not parse address: {0}".format(address.encode("ascii", "ignore")))
         if 'confidence' not in dstk_address:
             raise InvalidAddressException("Could not deal with DSTK return: {0}".format(dstk_address))
         if dstk_address['street_address'] == "":
@@ -452,13 +530,15 @@ class Address(object):
             if addr["locality"] not in address:
                 raise InvalidAddressException("DSTK returned a city not in the address. City: {0}, Address: {1}.".format(self.city, address))
         if "region" in addr:
-            self.state = addr["region"]
+            self.state = parser.state_map.get(addr["region"].upper(), addr["region"])
             # if "fips_county" in addr:
             # self.zip = addr["fips_county"]
         if "latitude" in addr:
             self.lat = addr["latitude"]
         if "longitude" in addr:
             self.lng = addr["longitude"]
+        if self.lat is not None and self.lng is not None:
+            self.geocode_precision = geocode.STREET
             # Try and find the apartment
         # First remove the street_address (this doesn't include apartment)
         if "street_address" in addr:
@@ -486,16 +566,12 @@ class Address(object):
         if split_addr[0] == self.house_number:
             split_addr = split_addr[1:]
         if self.logger: self.logger.debug("Checking {0} for suffixes".format(split_addr[-1].upper()))
-        if split_addr[-1].upper() in parser.suffixes.keys() or split_addr[-1].upper() in parser.suffixes.values():
+        if split_addr[-1].upper() in parser.suffix_map:
             self.street_suffix = split_addr[-1]
             split_addr = split_addr[:-1]
         if self.logger: self.logger.debug("Checking {0} for prefixes".format(split_addr[0].lower()))
-        if split_addr[0].lower() in parser.prefixes.keys() or split_addr[0].upper() in parser.prefixes.values() or \
-                                split_addr[0].upper() + '.' in parser.prefixes.values():
-            if split_addr[0][-1] == '.':
-                self.street_prefix = split_addr[0].upper()
-            else:
-                self.street_prefix = split_addr[0].upper() + '.'
+        if split_addr[0].lower() in parser.prefix_map:
+            self.street_prefix = parser.prefix_map[split_addr[0].lower()]
             if self.logger: self.logger.debug("Saving prefix: {0}".format(self.street_prefix))
             split_addr = split_addr[1:]
         if self.logger: self.logger.debug("Saving street: {0}".format(split_addr))
@@ -511,6 +587,9 @@ class Address(object):
         city_position = match
         if city_position.start(0) < street_position.end(0):
             raise InvalidAddressException("DSTK picked a street that comes after the city. Street: {0}. City: {1}. Address: {2}.".format(self.street, self.city, address))
+        # With a street list, DSTK's street has to be on it, give or take parser.fuzzy_streets typos.
+        if parser.street_index and not self.correct_street():
+            raise InvalidAddressException("DSTK picked a street not in the street list. Street: {0}. Address: {1}.".format(self.street, address))
         if self.logger: self.logger.debug("Successful DSTK address: {0}, house: {1}, street: {2}\n".format(self.original, self.house_number, self.street))
 
     def _get_dstk_intersections(self, address, dstk_address):
@@ -532,21 +611,17 @@ class Address(object):
         """
         normalized_address = []
         if self.logger: self.logger.debug("Normalizing Address: {0}".format(address))
+        suffix_map = self.parser.suffix_map
+        prefix_map = self.parser.prefix_map
         for token in address.split():
-            if token.upper() in self.parser.suffixes.keys():
-                normalized_address.append(self.parser.suffixes[token.upper()].lower())
-            elif token.upper() in self.parser.suffixes.values():
-                normalized_address.append(token.lower())
-            elif token.upper().replace('.', '') in self.parser.suffixes.values():
-                normalized_address.append(token.lower().replace('.', ''))
-            elif token.lower() in self.parser.prefixes.keys():
-                normalized_address.append(self.parser.prefixes[token.lower()].lower())
-            elif token.upper() in self.parser.prefixes.values():
-                normalized_address.append(token.lower()[:-1])
-            elif token.upper() + '.' in self.parser.prefixes.values():
-                normalized_address.append(token.lower())
+            lower = token.lower()
+            suffix = suffix_map.get(token.upper())
+            if suffix is not None:
+                normalized_address.append(suffix.lower())
+            elif lower in prefix_map:
+                normalized_address.append(prefix_map[lower].lower())
             else:
-                normalized_address.append(token.lower())
+                normalized_address.append(lower)
         return normalized_address
 
     def _clean(self, item):
@@ -1,8 +1,65 @@
-#from address import Address
+from address import Address, InvalidAddressException
+from cache import GeocodeCache, ParseCache, normalize_key
+from enrich import PlaceIndex
+import canonical
+import collections
 import dstk
-import os
+import dstk_async
+import parallel
+from gazetteer import Gazetteer
+import reference
+import threading
+import units
+from zipcodes import ZipTable
 
-cwd = os.path.dirname(os.path.realpath(__file__))
+
+class ParseResult(collections.namedtuple('ParseResult', ['line_number', 'original', 'address', 'error'])):
+    """
+    The outcome of parsing one address in a batch. address is the parsed Address, or ParsedAddress for compact
+    batches, or None if parsing failed, in which case error holds the exception that was raised.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# Lower case street prefixes to their standard form.
+PREFIXES = {
+    "n": "N.", "e": "E.", "s": "S.", "w": "W.", "ne": "NE.", "nw": "NW.", 'se': "SE.", 'sw': "SW.", 'north': "N.",
+    'east': "E.", 'south': "S.",
+    'west': "W.", 'northeast': "NE.", 'northwest': "NW.", 'southeast': "SE.", 'southwest': "SW."}
+# State names to their postal abbreviations.
+STATES = {
+    'Mississippi': 'MS', 'Oklahoma': 'OK', 'Delaware': 'DE', 'Minnesota': 'MN', 'Illinois': 'IL', 'Arkansas': 'AR',
+    'New Mexico': 'NM', 'Indiana': 'IN', 'Maryland': 'MD', 'Louisiana': 'LA', 'Idaho': 'ID', 'Wyoming': 'WY',
+    'Tennessee': 'TN', 'Arizona': 'AZ', 'Iowa': 'IA', 'Michigan': 'MI', 'Kansas': 'KS', 'Utah': 'UT',
+    'Virginia': 'VA', 'Oregon': 'OR', 'Connecticut': 'CT', 'Montana': 'MT', 'California': 'CA',
+    'Massachusetts': 'MA', 'West Virginia': 'WV', 'South Carolina': 'SC', 'New Hampshire': 'NH',
+    'Wisconsin': 'WI', 'Vermont': 'VT', 'Georgia': 'GA', 'North Dakota': 'ND', 'Pennsylvania': 'PA',
+    'Florida': 'FL', 'Alaska': 'AK', 'Kentucky': 'KY', 'Hawaii': 'HI', 'Nebraska': 'NE', 'Missouri': 'MO',
+    'Ohio': 'OH', 'Alabama': 'AL', 'New York': 'NY', 'South Dakota': 'SD', 'Colorado': 'CO', 'New Jersey': 'NJ',
+    'Washington': 'WA', 'North Carolina': 'NC', 'District of Columbia': 'DC', 'Texas': 'TX', 'Nevada': 'NV',
+    'Maine': 'ME', 'Rhode Island': 'RI'}
+
+
+def strip_address(address):
+    """
+    Strip one row of a batch, raising TypeError if it isn't a string, so the row fails instead of the batch.
+    """
+    if not isinstance(address, basestring):
+        raise TypeError("Addresses must be strings, not {0}.".format(type(address).__name__))
+    return address.strip()
+
+
+def build_street_index(streets):
+    """
+    Index a street list in a read-only Gazetteer.
+    """
+    index = Gazetteer(streets)
+    index.freeze()
+    return index
 
 
 class AddressParser(object):
@@ -11,29 +68,44 @@ class AddressParser(object):
     suffixes, and street names that will help the Address object correctly parse the given string. It is loaded
     with defaults that work in the average case, but can be adjusted for specific cases.
     """
-    suffixes = {}
-    # Lower case list of cities, used as a hint
-    cities = []
+    # The default suffixes, cities and streets are shared, read-only tables from the reference module. Overrides are
+    # kept per instance.
+    _suffixes = None
+    # Lower case gazetteer of cities, used as a hint
+    cities = None
     # Lower case list of streets, used as a hint
-    streets = []
-    prefixes = {
-        "n": "N.", "e": "E.", "s": "S.", "w": "W.", "ne": "NE.", "nw": "NW.", 'se': "SE.", 'sw': "SW.", 'north': "N.",
-        'east': "E.", 'south': "S.",
-        'west': "W.", 'northeast': "NE.", 'northwest': "NW.", 'southeast': "SE.", 'southwest': "SW."}
-    states = {
-        'Mississippi': 'MS', 'Oklahoma': 'OK', 'Delaware': 'DE', 'Minnesota': 'MN', 'Illinois': 'IL', 'Arkansas': 'AR',
-        'New Mexico': 'NM', 'Indiana': 'IN', 'Maryland': 'MD', 'Louisiana': 'LA', 'Idaho': 'ID', 'Wyoming': 'WY',
-        'Tennessee': 'TN', 'Arizona': 'AZ', 'Iowa': 'IA', 'Michigan': 'MI', 'Kansas': 'KS', 'Utah': 'UT',
-        'Virginia': 'VA', 'Oregon': 'OR', 'Connecticut': 'CT', 'Montana': 'MT', 'California': 'CA',
-        'Massachusetts': 'MA', 'West Virginia': 'WV', 'South Carolina': 'SC', 'New Hampshire': 'NH',
-        'Wisconsin': 'WI', 'Vermont': 'VT', 'Georgia': 'GA', 'North Dakota': 'ND', 'Pennsylvania': 'PA',
-        'Florida': 'FL', 'Alaska': 'AK', 'Kentucky': 'KY', 'Hawaii': 'HI', 'Nebraska': 'NE', 'Missouri': 'MO',
-        'Ohio': 'OH', 'Alabama': 'AL', 'New York': 'NY', 'South Dakota': 'SD', 'Colorado': 'CO', 'New Jersey': 'NJ',
-        'Washington': 'WA', 'North Carolina': 'NC', 'District of Columbia': 'DC', 'Texas': 'TX', 'Nevada': 'NV',
-        'Maine': 'ME', 'Rhode Island': 'RI'}
-    zips = None
-
-    def __init__(self, suffixes=None, cities=None, streets=None, zips=None, logger=None, backend="default"):
+    _streets = None
+    # Gazetteer of the streets, for exact multi word and fuzzy lookups. Rebuilt whenever streets is set.
+    street_index = None
+    # Maximum edit distance when correcting streets against the street list, 0 for exact matches only.
+    fuzzy_streets = 0
+    # Maximum edit distance when an exact city lookup misses, 0 to turn fuzzy cities off.
+    fuzzy_cities = 0
+    # Memory budget for each fuzzy index, in index entries, or None for no limit. See fuzzy.prefix_length_for.
+    fuzzy_max_entries = None
+    _prefixes = PREFIXES
+    _states = STATES
+    # Every spelling of a suffix, prefix or state to its standard form, see the canonical module. Rebuilt whenever
+    # suffixes, prefixes or states is set.
+    suffix_map = None
+    prefix_map = canonical.build_prefix_map(PREFIXES)
+    state_map = canonical.build_state_map(STATES)
+    # Loaded on first use, see the zips property.
+    _zips = None
+    # Compiled apartment regexes, shared by every parser unless replaced.
+    unit_extractor = units.default_extractor
+    # ParseCache of recent outcomes, if caching is turned on with cache_size.
+    cache = None
+    # Fill in and check city and state against the zip table after every parse, see the enrich module.
+    enrich = False
+    # Set lat and lng from the zip or city centroid after every parse, see the geocode module.
+    geocode = False
+    # PlaceIndex of the zip table, built on first use, see the place_index property.
+    _place_index = None
+
+    def __init__(self, suffixes=None, cities=None, streets=None, zips=None, logger=None, backend="default",
+                 cache_size=None, fuzzy_streets=0, fuzzy_cities=0, fuzzy_max_entries=None,
+                 enrich=False, geocode=False):
         """
         suffixes, cities and streets provide a chance to use different lists than the provided lists.
         suffixes is probably good for most users, unless you have some suffixes not recognized by USPS.
@@ -43,95 +115,276 @@ class AddressParser(object):
         streets can be used to limit the list of possible streets the address are on. It comes blank by default and
         uses positional clues instead. If you are instead just doing a couple cities, a list of all possible streets
         will decrease incorrect street names.
+        zips replaces the zip code table, as a ZipTable or a dict of zip to a dict with city, state, lat and lng keys,
+        which is converted to a ZipTable.
         Valid backends include "default" and "dstk". If backend is dstk, it requires a dstk_api_base. Example of
         dstk_api_base would be 'http://example.com'.
+        cache_size turns on a cache of the last cache_size parse outcomes, including invalid addresses. It's keyed on
+        the address with case and whitespace folded, so fields copied from the input as is, such as the apartment,
+        keep the case of the first spelling seen.
+        fuzzy_streets is the number of typos (edits) to correct when matching streets against the street list. It is
+        off, 0, by default. Corrections are listed in Address.fuzzy_matches.
+        fuzzy_cities is the same for cities. It is only tried when no city matches exactly.
+        fuzzy_max_entries caps the size of each fuzzy index. The city index has about 150k entries for one typo and
+        380k for two by default, and is built on the first fuzzy lookup, or by preload().
+        enrich fills in a missing city and state from the zip, and flags ones that don't match it, without a network
+        call. See enrich.enrich_address, Address.enriched and Address.zip_mismatch.
+        geocode sets lat and lng offline, from the centroid of the zip, or of the city's zips if there is no zip.
+        Address.geocode_precision says which. Addresses the dstk backend located keep its coordinates.
         """
         self.logger = logger
+        self.enrich = enrich
+        self.geocode = geocode
+        self.fuzzy_streets = fuzzy_streets
+        self.fuzzy_cities = fuzzy_cities
+        self.fuzzy_max_entries = fuzzy_max_entries
+        if cache_size:
+            self.cache = ParseCache(cache_size)
         self.backend = backend
         if suffixes:
             self.suffixes = suffixes
         else:
-            self.load_suffixes(os.path.join(cwd, "suffixes.csv"))
-        if cities:
+            self.suffixes = reference.suffixes()
+        if isinstance(cities, Gazetteer):
             self.cities = cities
+        elif cities:
+            self.cities = Gazetteer(cities)
         else:
-            self.load_cities(os.path.join(cwd, "cities.csv"))
+            self.cities = reference.cities()
         if streets:
             self.streets = streets
         else:
-            self.load_streets(os.path.join(cwd, "streets.csv"))
+            self.streets = reference.streets()
         if zips:
             self.zips = zips
-        else:
-            self.load_zips(os.path.join(cwd, "zipcodes.csv"))
 
     def parse_address(self, address, line_number=-1):
         """
         Return an Address object from the given address. Passes itself to the Address constructor to use all the custom
         loaded suffixes, cities, etc.
         """
-        return Address(address, self, line_number, self.logger)
+        if self.cache is None or address is None:
+            return Address(address, self, line_number, self.logger)
+        return self._parse_cached(address, line_number, False)
+
+    def _parse_cached(self, address, line_number, compact):
+        """
+        Parse through the cache, returning an Address or, if compact is True, a ParsedAddress. Invalid addresses are
+        cached too and raise the same exception again.
+        """
+        key = normalize_key(address)
+        cached = self.cache.get(key)
+        if cached is None:
+            try:
+                parsed = Address(address, self, line_number, self.logger)
+            except InvalidAddressException as e:
+                self.cache.put(key, e)
+                raise
+            result = parsed.to_result()
+            self.cache.put(key, result)
+            return result if compact else parsed
+        if isinstance(cached, Exception):
+            raise cached.__class__(*cached.args)
+        result = cached._replace(original=address.encode("utf-8", "replace"), line_number=line_number)
+        if compact:
+            return result
+        return Address.from_result(result, self, self.logger)
+
+    def cache_info(self):
+        """
+        Hits, misses, evictions and size of the parse cache as a CacheInfo, or None if caching is off.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.info()
+
+    def clear_cache(self):
+        """
+        Forget every cached parse. The load_* methods call this, since new tables can change how addresses parse.
+        """
+        if self.cache is not None:
+            self.cache.clear()
+
+    def parse_many(self, addresses, start=0, compact=False):
+        """
+        Parse every address in an iterable, such as a list or an open file with one address per line, and yield a
+        ParseResult for each one, in order. Results are produced lazily, so only one address is held at a time.
+        Addresses that can't be parsed are yielded with the exception in error instead of raising, so one bad row
+        doesn't stop the batch. Line numbers count from start. If compact is True, each result holds a ParsedAddress
+        instead of an Address, which is worth it when the results are kept or sent to another process.
+        """
+        # Look these up once instead of once per row.
+        make_address = Address
+        logger = self.logger
+        cache = self.cache
+        for line_number, address in enumerate(addresses, start):
+            try:
+                address = strip_address(address)
+                if cache is not None:
+                    parsed = self._parse_cached(address, line_number, compact)
+                else:
+                    parsed = make_address(address, self, line_number, logger)
+                    if compact:
+                        parsed = parsed.to_result()
+            except Exception as e:
+                yield ParseResult(line_number, address, None, e)
+                continue
+            yield ParseResult(line_number, address, parsed, None)
+
+    def parse_parallel(self, addresses, workers=None, chunk_size=500, ordered=True, compact=False):
+        """
+        Like parse_many, but spreads the work over a pool of worker processes, workers of them, defaulting to the
+        number of CPUs. See parallel.parse_parallel for how chunk_size, ordered and compact are used.
+        """
+        return parallel.parse_parallel(self, addresses, workers, chunk_size, ordered, compact)
 
     def load_suffixes(self, filename):
         """
-        Build the suffix dictionary. The keys will be possible long versions, and the values will be the
+        Add suffixes from a file to this parser. The keys will be possible long versions, and the values will be the
         accepted abbreviations. Everything should be stored using the value version, and you can search all
-        by using building a set of self.suffixes.keys() and self.suffixes.values().
+        by using building a set of self.suffixes.keys() and self.suffixes.values(). The shared default table is
+        copied, never changed.
         """
-        with open(filename, 'r') as f:
-            for line in f:
-                # Make sure we have key and value
-                if len(line.split(',')) != 2:
-                    continue
-                    # Strip off newlines.
-                self.suffixes[line.strip().split(',')[0]] = line.strip().split(',')[1]
+        suffixes = dict(self.suffixes or {})
+        suffixes.update(reference.read_suffixes(filename))
+        self.suffixes = suffixes
+        self.clear_cache()
 
     def load_cities(self, filename):
         """
         Load up all cities in lowercase for easier matching. The file should have one city per line, with no extra
-        characters. This isn't strictly required, but will vastly increase the accuracy.
+        characters. This isn't strictly required, but will vastly increase the accuracy. The shared default table is
+        copied, never changed.
         """
-        with open(filename, 'r') as f:
-            for line in f:
-                self.cities.append(line.strip().lower())
+        cities = Gazetteer(self.cities or ())
+        cities.load(filename)
+        self.cities = cities
+        self.clear_cache()
 
     def load_streets(self, filename):
         """
         Load up all streets in lowercase for easier matching. The file should have one street per line, with no extra
-        characters. This isn't strictly required, but will vastly increase the accuracy.
+        characters. This isn't strictly required, but will vastly increase the accuracy. The shared default table is
+        copied, never changed.
         """
-        with open(filename, 'r') as f:
-            for line in f:
-                self.streets.append(line.strip().lower())
+        self.streets = list(self.streets or ()) + reference.read_streets(filename)
+        self.clear_cache()
 
     def load_zips(self, filename):
         """
         Caches the zip file into memory. Erases previously cached data.
         """
-        self.zips = {}
-        with open(filename, 'r') as zipfile:
-            for line in zipfile.readlines():
-                if line.strip() == "":
-                    continue
-                line = line.replace('"', '').replace('\n', '')
-                members = line.split(',')
-                if members[0] in self.zips:
-                    print "Duplicate zip info!", members[0]
-                self.zips[members[0]] = {
-                    "zip": members[0],
-                    "city": members[1],
-                    "state": members[2],
-                    "lat": members[3],
-                    "lng": members[4],
-                    "timezone": members[5],
-                    # Sets to True for dst==1, False for dst==0
-                    "dst": members[6] == "1"
-                }
+        self.zips = reference.read_zips(filename)
+
+    @property
+    def suffixes(self):
+        """
+        Suffix table, from possible long versions to the accepted abbreviations. Assign a new dict to change it, the
+        suffix_map is only rebuilt then.
+        """
+        return self._suffixes
+
+    @suffixes.setter
+    def suffixes(self, suffixes):
+        self._suffixes = suffixes
+        if reference.is_shared(suffixes):
+            self.suffix_map = canonical.shared_map(suffixes, canonical.build_suffix_map)
+        else:
+            self.suffix_map = canonical.build_suffix_map(suffixes)
+
+    @property
+    def streets(self):
+        """
+        List of lower case street names, without suffixes, used as a hint. Assign a new list to change it, the
+        street_index is only rebuilt then.
+        """
+        return self._streets
+
+    @streets.setter
+    def streets(self, streets):
+        self._streets = streets
+        if reference.is_shared(streets):
+            self.street_index = canonical.shared_map(streets, build_street_index)
+        else:
+            self.street_index = Gazetteer(streets)
+
+    @property
+    def prefixes(self):
+        """
+        Street prefix table, from lower case prefixes to their standard forms. Assign a new dict to change it.
+        """
+        return self._prefixes
+
+    @prefixes.setter
+    def prefixes(self, prefixes):
+        self._prefixes = prefixes
+        self.prefix_map = canonical.build_prefix_map(prefixes)
+
+    @property
+    def states(self):
+        """
+        State table, from state names to postal abbreviations. Assign a new dict to change it.
+        """
+        return self._states
+
+    @states.setter
+    def states(self, states):
+        self._states = states
+        self.state_map = canonical.build_state_map(states)
+
+    @property
+    def zips(self):
+        """
+        The zip code table used by Address.zip_info. The packaged table is only read the first time this is used,
+        which keeps parsers that never look up zips cheap to create.
+        """
+        if self._zips is None:
+            self._zips = reference.zips()
+        return self._zips
+
+    @zips.setter
+    def zips(self, zips):
+        if isinstance(zips, dict):
+            zips = ZipTable.from_dict(zips)
+        elif not isinstance(zips, ZipTable):
+            raise TypeError("zips must be a ZipTable or a dict of zip to zip info, not {0}.".format(
+                type(zips).__name__))
+        self._zips = zips
+        self._place_index = None
+
+    @property
+    def place_index(self):
+        """
+        The PlaceIndex of the zip table, for finding the zips of a city. Built the first time it is used, and only
+        once per process for the packaged table.
+        """
+        if self._place_index is None:
+            if reference.is_shared(self.zips):
+                self._place_index = canonical.shared_map(self.zips, PlaceIndex)
+            else:
+                self._place_index = PlaceIndex(self.zips)
+        return self._place_index
+
+    def preload(self):
+        """
+        Load every lazily loaded table, and build the fuzzy indexes that are turned on, now instead of on first use.
+        Useful for services that want the first request to be as fast as the rest.
+        """
+        # Reading the property is enough to load it.
+        self.zips
+        if self.enrich or self.geocode:
+            self.place_index
+        if self.fuzzy_cities:
+            self.cities.fuzzy_index(self.fuzzy_cities, self.fuzzy_max_entries)
+        if self.fuzzy_streets and self.street_index:
+            self.street_index.fuzzy_index(self.fuzzy_streets, self.fuzzy_max_entries)
+        return self
 
 
 class DSTKAddressParser(AddressParser):
     def __init__(self, suffixes=None, cities=None, streets=None, zips=None, logger=None, backend="default",\
-                 dstk_api_base=None, required_confidence=0.65):
+                 dstk_api_base=None, required_confidence=0.65, dstk_pool_size=4, dstk_timeout=30,
+                 dstk_concurrency=None, dstk_cache=None, **kwargs):
         """
         suffixes, cities and streets provide a chance to use different lists than the provided lists.
         suffixes is probably good for most users, unless you have some suffixes not recognized by USPS.
@@ -143,32 +396,150 @@ class DSTKAddressParser(AddressParser):
         will decrease incorrect street names.
         Valid backends include "default" and "dstk". If backend is dstk, it requires a dstk_api_base. Example of
         dstk_api_base would be 'http://example.com'.
+        dstk_pool_size is the most keep-alive connections to hold open to the DSTK server, and dstk_timeout the socket
+        timeout in seconds. dstk_concurrency is the number of threads that send the requests of the *_async
+        methods, by default one per pooled connection. dstk_cache is a cache.GeocodeCache, or the path of one to open,
+        to keep street2coordinates results in, so only addresses it doesn't have are sent to DSTK. Any other keyword
+        arguments, such as cache_size, are passed on to AddressParser.
         """
-        super(AddressParser, self).__init__(suffixes, cities, streets, zips, logger)
+        if backend not in ("default", "dstk"):
+            raise ValueError("backend must be either 'default' or 'dstk'.")
+        super(DSTKAddressParser, self).__init__(suffixes, cities, streets, zips, logger, backend, **kwargs)
         self.dstk_api_base = dstk_api_base
         self.required_confidence = required_confidence
+        self.dstk_concurrency = dstk_concurrency
+        self._dstk_async = None
+        self._dstk_async_lock = threading.Lock()
         if backend == "dstk":
             if dstk_api_base is None:
                 raise ValueError("dstk_api_base is required for dstk backend.")
-            self.dstk = dstk.DSTK({'apiBase': dstk_api_base})
-        elif backend == "default":
-            pass
-        else:
-            raise ValueError("backend must be either 'default' or 'dstk'.")
+            if isinstance(dstk_cache, basestring):
+                dstk_cache = GeocodeCache(dstk_cache)
+            self.dstk = dstk.DSTK({'apiBase': dstk_api_base, 'poolSize': dstk_pool_size, 'timeout': dstk_timeout,
+                                   'cache': dstk_cache})
+
+    def dstk_multi_address(self, address_list, chunk_size=100, concurrency=None):
+        """
+        Parse a list of addresses through DSTK and return the Addresses that parsed, in input order. See
+        dstk_parse_many for chunk_size and concurrency, and for the reason each address failed.
+        """
+        addresses = []
+        for result in self.dstk_parse_many(address_list, chunk_size=chunk_size, concurrency=concurrency):
+            if result.error is not None:
+                if self.logger: self.logger.debug("DSTK parse failed for {0}: {1}".format(result.original, result.error))
+                continue
+            addresses.append(result.address)
+        return addresses
 
-    def dstk_multi_address(self, address_list):
+    def dstk_parse_many(self, addresses, start=0, compact=False, chunk_size=100, concurrency=None):
+        """
+        Like parse_many, but through DSTK. Addresses are sent to street2coordinates chunk_size at a time, with up to
+        concurrency requests in flight at once, defaulting to the size of the connection pool. ParseResults are
+        yielded in input order as their chunks come back, with the exception in error for addresses DSTK couldn't
+        parse or that failed validation, and for every address in a chunk whose request failed.
+        """
         if self.backend != "dstk":
             raise ValueError("Only allowed for DSTK backends.")
+        concurrency = concurrency or self.dstk.pool.size
+
+        def parse_chunk(chunk):
+            return self._dstk_parse_chunk(chunk[0] + start, chunk[1], compact)
+        return parallel.map_threads(parse_chunk, addresses, chunk_size, concurrency)
+
+    def _dstk_parse_chunk(self, start, address_list, compact):
+        """
+        Send one chunk of addresses to DSTK and return a ParseResult for each. Rows that aren't strings fail
+        without being sent.
+        """
+        rows = []
+        for line_number, address in enumerate(address_list, start):
+            try:
+                rows.append((line_number, strip_address(address), None))
+            except TypeError as e:
+                rows.append((line_number, address, e))
+        address_list = [address for line_number, address, error in rows if error is None]
         if self.logger: self.logger.debug("Sending {0} possible addresses to DSTK".format(len(address_list)))
-        multi_address = self.dstk.street2coordinates(address_list)
+        try:
+            multi_address = self.dstk.street2coordinates(address_list) if address_list else {}
+        except Exception as e:
+            return [ParseResult(line_number, address, None, error or e) for line_number, address, error in rows]
         if self.logger: self.logger.debug("Received {0} addresses from DSTK".format(len(multi_address)))
-        # if self.logger: self.logger.debug("End street2coords")
-        addresses = []
-        # if self.logger: self.logger.debug("Multi Addresses: {0}".format(multi_address))
-        for address, dstk_return in multi_address.items():
-            if dstk_return is None:
-                # if self.logger: self.logger.debug("DSTK None return for: {0}".format(address))
+        results = []
+        for line_number, address, error in rows:
+            if error is not None:
+                results.append(ParseResult(line_number, address, None, error))
+                continue
+            dstk_return = multi_address.get(address)
+            try:
+                if dstk_return is None:
+                    raise InvalidAddressException("DSTK could not parse address: {0}".format(address))
+                parsed = Address(address, self, line_number, self.logger, dstk_pre_parse=dstk_return)
+                if compact:
+                    parsed = parsed.to_result()
+            except Exception as e:
+                results.append(ParseResult(line_number, address, None, e))
                 continue
-            addresses.append(Address(address, self, -1, self.logger, dstk_pre_parse=dstk_return))
-            if self.logger: self.logger.debug("DSTK Address Appended: {0}".format(dstk_return))
-        return addresses
\ No newline at end of file
+            results.append(ParseResult(line_number, address, parsed, None))
+        return results
+
+    def dstk_cache_info(self):
+        """
+        Hits, misses, expired entries, evictions and size of the DSTK geocode cache as a GeocodeCacheInfo, or None if
+        there is no cache.
+        """
+        if self.backend != "dstk" or self.dstk.cache is None:
+            return None
+        return self.dstk.cache.info()
+
+    @property
+    def dstk_async(self):
+        """
+        The AsyncDSTK that runs the requests of the *_async methods, started the first time it is used.
+        """
+        if self.backend != "dstk":
+            raise ValueError("Only allowed for DSTK backends.")
+        if self._dstk_async is None:
+            with self._dstk_async_lock:
+                if self._dstk_async is None:
+                    self._dstk_async = dstk_async.AsyncDSTK(self.dstk, self.dstk_concurrency)
+        return self._dstk_async
+
+    def parse_address_async(self, address, line_number=-1, timeout=None):
+        """
+        Return a dstk_async.Future for the Address DSTK parses address into, with the same confidence and
+        validation checks as parse_address. timeout is how many seconds the request may wait for a free connection
+        before failing with DSTKTimeout. The future can be cancelled until the request is sent.
+        """
+        return self.dstk_async.submit(Address, (address, self, line_number, self.logger), timeout)
+
+    def dstk_parse_many_async(self, addresses, start=0, compact=False, chunk_size=100, timeout=None):
+        """
+        Return a dstk_async.Future for the list of ParseResults dstk_parse_many would yield. Every chunk is queued
+        at once and sent as connections free up. A chunk that times out or is cancelled has the exception in error
+        for each of its addresses. Cancelling the future cancels every chunk that hasn't been sent.
+        """
+        chunks = []
+        futures = []
+        for chunk_start, chunk in parallel._chunks(addresses, chunk_size):
+            chunks.append((chunk_start + start, chunk))
+            futures.append(self.dstk_async.submit(self._dstk_parse_chunk, (chunk_start + start, chunk, compact),
+                                                  timeout))
+
+        def flatten(chunk_results):
+            results = []
+            for (chunk_start, chunk), outcome in zip(chunks, chunk_results):
+                if isinstance(outcome, Exception):
+                    outcome = [ParseResult(line_number, address, None, outcome)
+                               for line_number, address in enumerate(chunk, chunk_start)]
+                results.extend(outcome)
+            return results
+        return dstk_async.chain(dstk_async.gather(futures, return_exceptions=True), flatten)
+
+    def dstk_multi_address_async(self, address_list, chunk_size=100, timeout=None):
+        """
+        Return a dstk_async.Future for the list of Addresses dstk_multi_address would return.
+        """
+        def addresses(results):
+            return [result.address for result in results if result.error is None]
+        return dstk_async.chain(self.dstk_parse_many_async(address_list, chunk_size=chunk_size, timeout=timeout),
+                                addresses)
@@ -0,0 +1,192 @@
+# Bulk address parsing from the command line. Reads addresses from a CSV, JSON lines or plain text file (or stdin),
+# streams them through AddressParser and writes one structured row per address as CSV or JSON lines. A summary with
+# throughput and invalid/unmatched rates is printed to stderr at the end.
+#
+#   python -m address.bulk addresses.csv --column address --workers 4 -o parsed.csv
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from address_parser import AddressParser
+
+FIELDS = ['line_number', 'original', 'house_number', 'street_prefix', 'street', 'street_suffix', 'apartment', 'city',
+          'state', 'zip', 'unmatched', 'error']
+# Extra columns with --enrich, the names of the fields filled in from the zip and of those that don't match it.
+ENRICH_FIELDS = ['enriched', 'zip_mismatch']
+# Extra columns with --geocode.
+GEOCODE_FIELDS = ['lat', 'lng', 'geocode_precision']
+
+
+def guess_format(filename):
+    """
+    Guess the input format from a file name, defaulting to plain text with one address per line.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.json'):
+        return 'jsonl'
+    return 'text'
+
+
+def read_addresses(f, input_format, column=None):
+    """
+    Return a lazy iterator of address strings from an open file. column picks the field for CSV and JSON lines input.
+    CSV defaults to the first column and JSON lines to the "address" key. The CSV header is checked right away, and
+    raises ValueError if column isn't in it. Lines that aren't JSON objects raise ValueError when they are reached.
+    """
+    if input_format == 'csv':
+        reader = csv.DictReader(f)
+        if not reader.fieldnames:
+            return iter(())
+        column = column or reader.fieldnames[0]
+        if column not in reader.fieldnames:
+            raise ValueError("Column {0} is not in the CSV header.".format(column))
+        return (row[column] or '' for row in reader)
+    if input_format == 'jsonl':
+        return _read_jsonl(f, column or 'address')
+    return iter(f)
+
+
+def _read_jsonl(f, column):
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise ValueError("Line {0} is not JSON: {1}".format(line_number, e))
+        if not isinstance(row, dict):
+            raise ValueError("Line {0} is not a JSON object.".format(line_number))
+        yield row.get(column) or ''
+
+
+def to_row(result, fields=FIELDS):
+    """
+    Flatten a ParseResult into a dict with a key for every name in fields, FIELDS plus any of the optional columns.
+    """
+    row = dict.fromkeys(fields)
+    row['line_number'] = result.line_number
+    row['original'] = result.original
+    if result.address is not None:
+        for field in FIELDS[2:10]:
+            row[field] = getattr(result.address, field)
+        row['unmatched'] = result.address.unmatched
+        for field in ENRICH_FIELDS:
+            if field in row:
+                row[field] = ' '.join(getattr(result.address, field))
+        for field in GEOCODE_FIELDS:
+            if field in row:
+                row[field] = getattr(result.address, field)
+    else:
+        row['error'] = str(result.error)
+    return row
+
+
+class _CSVWriter(object):
+    def __init__(self, f, fields=FIELDS):
+        self._writer = csv.DictWriter(f, fields)
+        self._writer.writerow(dict(zip(fields, fields)))
+
+    def write(self, row):
+        self._writer.writerow(dict((key, value.encode('utf-8') if isinstance(value, unicode) else value)
+                                   for key, value in row.items()))
+
+
+class _JSONLWriter(object):
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, row):
+        self._f.write(json.dumps(row) + '\n')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m address.bulk',
+                                     description="Parse a file of addresses into structured CSV or JSON lines.")
+    parser.add_argument('input', nargs='?', default='-', help="Input file, or - for stdin (the default).")
+    parser.add_argument('-f', '--format', choices=['csv', 'jsonl', 'text'],
+                        help="Input format. Guessed from the file extension, text for stdin.")
+    parser.add_argument('-c', '--column',
+                        help="CSV column or JSON key holding the address. Defaults to the first CSV column or the "
+                             "\"address\" key.")
+    parser.add_argument('-o', '--output', default='-', help="Output file, or - for stdout (the default).")
+    parser.add_argument('-t', '--output-format', choices=['csv', 'jsonl'], default='csv', help="Output format.")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="Worker processes to parse with. 0 uses one per CPU. Defaults to 1, no pool.")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Addresses sent to a worker at a time.")
+    parser.add_argument('--unordered', action='store_true',
+                        help="With --workers, write results as they finish instead of in input order.")
+    parser.add_argument('--enrich', action='store_true',
+                        help="Fill in missing cities and states from the zip table and flag ones that don't match "
+                             "the zip. Adds the enriched and zip_mismatch columns.")
+    parser.add_argument('--geocode', action='store_true',
+                        help="Set coordinates from the zip, or city, centroid in the zip table. Adds the lat, lng and "
+                             "geocode_precision columns.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """
+    Run the bulk parser. Returns the exit code.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    args = parse_args(argv)
+    if args.input == '-':
+        input_file = stdin
+    else:
+        input_file = open(args.input, 'rb')
+    output_file = stdout if args.output == '-' else open(args.output, 'wb')
+    input_format = args.format or ('text' if args.input == '-' else guess_format(args.input))
+
+    ap = AddressParser(enrich=args.enrich, geocode=args.geocode)
+    fields = FIELDS + (ENRICH_FIELDS if args.enrich else []) + (GEOCODE_FIELDS if args.geocode else [])
+
+    total = invalid = unmatched = 0
+    start = time.time()
+    try:
+        # Bad rows raise ValueError in this thread with any number of workers, parse_parallel re-raises errors from
+        # reading the input once the rows before them are written.
+        addresses = read_addresses(input_file, input_format, args.column)
+        if args.workers == 1:
+            results = ap.parse_many(addresses, compact=True)
+        else:
+            results = ap.parse_parallel(addresses, workers=args.workers or None, chunk_size=args.chunk_size,
+                                        ordered=not args.unordered, compact=True)
+        if args.output_format == 'jsonl':
+            writer = _JSONLWriter(output_file)
+        else:
+            writer = _CSVWriter(output_file, fields)
+        for result in results:
+            total += 1
+            if result.address is None:
+                invalid += 1
+            elif result.address.unmatched:
+                unmatched += 1
+            writer.write(to_row(result, fields))
+    except ValueError as e:
+        # Bad input, such as a missing column or a line that isn't a JSON object.
+        stderr.write("Error reading {0}: {1}\n".format(args.input, e))
+        return 2
+    finally:
+        if input_file is not stdin:
+            input_file.close()
+        if output_file is not stdout:
+            output_file.close()
+    elapsed = time.time() - start
+
+    stderr.write("Parsed {0} addresses in {1:.2f}s ({2:.0f} addresses/s)\n".format(
+        total, elapsed, total / elapsed if elapsed else 0))
+    if total:
+        stderr.write("Invalid: {0} ({1:.2%}). Unmatched terms: {2} ({3:.2%})\n".format(
+            invalid, float(invalid) / total, unmatched, float(unmatched) / total))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
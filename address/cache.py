@@ -0,0 +1,203 @@
+# Caches for repeated work. Address feeds repeat themselves a lot, the same property shows up in listings, invoices
+# and contact records, so AddressParser can keep the outcome of recent parses and skip the whole check chain when the
+# same address comes around again. GeocodeCache does the same for DSTK geocoding responses, on disk, so addresses
+# resolved by an earlier run don't go back to the server.
+
+import collections
+import json
+import sqlite3
+import threading
+import time
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+GeocodeCacheInfo = collections.namedtuple('GeocodeCacheInfo',
+                                          ['hits', 'misses', 'expired', 'evictions', 'maxsize', 'currsize'])
+
+
+def normalize_key(address):
+    """
+    The cache key for a raw address string. Case and runs of whitespace are folded, so "2 Park St" and "2  PARK st"
+    share a key.
+    """
+    return ' '.join(address.lower().split())
+
+
+class ParseCache(object):
+    """
+    A thread safe, size bounded mapping that evicts the least recently used entry when it is full, and counts hits,
+    misses and evictions. Values must not be None, since get() returns None for a miss.
+    """
+
+    def __init__(self, maxsize=10000):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive.")
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Return the value for key and mark it as recently used, or None if it isn't cached.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            # Re-inserting moves the key to the recently used end.
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry. The counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __getstate__(self):
+        # A copy sent to another process, e.g. a parallel parsing worker, starts out empty.
+        return {'maxsize': self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state['maxsize'])
+
+
+class GeocodeCache(object):
+    """
+    A persistent cache of DSTK street2coordinates results in an SQLite database at path, keyed on the normalize_key of
+    the address. Results of None, addresses DSTK couldn't geocode, are cached too. Entries older than ttl seconds
+    are misses, and ttl None keeps them forever. Past maxsize entries the oldest are evicted. Safe to share between
+    threads. hits, misses, expired and evictions count for this instance only, the entries are shared by every
+    process using the file.
+    """
+    # Most addresses per query, under SQLite's limit on query parameters.
+    _BATCH = 500
+
+    def __init__(self, path=':memory:', ttl=None, maxsize=1000000):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive.")
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS geocodes "
+                             "(key TEXT PRIMARY KEY, response TEXT NOT NULL, stored REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS geocodes_stored ON geocodes (stored)")
+
+    @staticmethod
+    def _key(address):
+        key = normalize_key(address)
+        if isinstance(key, str):
+            key = key.decode('utf-8', 'replace')
+        return key
+
+    def get_many(self, addresses):
+        """
+        Look up every address and return a dict of the ones that are cached to their results, keyed on the address
+        as given.
+        """
+        keys = {}
+        for address in addresses:
+            keys.setdefault(self._key(address), []).append(address)
+        found = {}
+        expired = 0
+        oldest = None if self.ttl is None else time.time() - self.ttl
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), self._BATCH):
+                batch = key_list[i:i + self._BATCH]
+                rows = self._db.execute("SELECT key, response, stored FROM geocodes WHERE key IN ({0})".format(
+                    ','.join('?' * len(batch))), batch)
+                for key, response, stored in rows:
+                    if oldest is not None and stored < oldest:
+                        expired += 1
+                        continue
+                    result = json.loads(response)
+                    for address in keys[key]:
+                        found[address] = result
+            hits = len([key for key in key_list if keys[key][0] in found])
+            self.hits += hits
+            self.misses += len(key_list) - hits
+            self.expired += expired
+        return found
+
+    def set_many(self, results):
+        """
+        Store an iterable of (address, result) pairs, or a dict of them, then evict the oldest entries past maxsize.
+        """
+        if isinstance(results, dict):
+            results = results.items()
+        now = time.time()
+        rows = [(self._key(address), json.dumps(result), now) for address, result in results]
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO geocodes (key, response, stored) VALUES (?, ?, ?)", rows)
+                excess = self._db.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0] - self.maxsize
+                if excess > 0:
+                    self._db.execute("DELETE FROM geocodes WHERE key IN "
+                                     "(SELECT key FROM geocodes ORDER BY stored LIMIT ?)", (excess,))
+                    self.evictions += excess
+
+    def get(self, address, default=None):
+        return self.get_many([address]).get(address, default)
+
+    def set(self, address, result):
+        self.set_many([(address, result)])
+
+    def purge_expired(self):
+        """
+        Delete the entries older than ttl and return how many there were.
+        """
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            with self._db:
+                return self._db.execute("DELETE FROM geocodes WHERE stored < ?", (time.time() - self.ttl,)).rowcount
+
+    def clear(self):
+        """
+        Delete every entry. The counters are kept.
+        """
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM geocodes")
+
+    def info(self):
+        return GeocodeCacheInfo(self.hits, self.misses, self.expired, self.evictions, self.maxsize, len(self))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
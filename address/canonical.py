@@ -0,0 +1,77 @@
+# Canonical form maps for suffixes, prefixes and states. The parser tables map long forms to standard ones, e.g.
+# "AVENUE" to "AVE", so checking whether a token is already a standard form used to mean scanning dict.values().
+# These maps take every spelling, long or standard, with or without periods, straight to the standard form in one
+# dict lookup. AddressParser builds them whenever its tables are set.
+
+import threading
+
+# The maps for the shared read-only tables, by id of the table. The table is kept alongside its map so the id can't
+# be reused while the entry exists.
+_shared = {}
+_lock = threading.Lock()
+
+
+def _variants(form):
+    """
+    The spellings of form to map: as given, without periods, and without periods plus a trailing period.
+    """
+    bare = form.replace('.', '')
+    return (form, bare, bare + '.')
+
+
+def build_suffix_map(suffixes):
+    """
+    Map every upper case spelling of the keys and values of a suffix table to its abbreviation. Exact keys win over
+    values, and both win over spellings with the periods changed, the same order the suffix checks used.
+    """
+    suffix_map = {}
+    for abbreviation in suffixes.values():
+        suffix_map[abbreviation.upper()] = abbreviation
+    for suffix, abbreviation in suffixes.items():
+        suffix_map[suffix.upper()] = abbreviation
+    for suffix, abbreviation in suffixes.items():
+        for form in (suffix, abbreviation):
+            for variant in _variants(form.upper()):
+                suffix_map.setdefault(variant, abbreviation)
+    return suffix_map
+
+
+def build_prefix_map(prefixes):
+    """
+    Map every lower case spelling of the keys and values of a prefix table, such as "north", "n" and "n.", to the
+    standard prefix, e.g. "N.".
+    """
+    prefix_map = {}
+    for prefix, standard in prefixes.items():
+        prefix_map[prefix.lower()] = standard
+    for prefix, standard in prefixes.items():
+        for form in (prefix, standard):
+            for variant in _variants(form.lower()):
+                prefix_map.setdefault(variant, standard)
+    return prefix_map
+
+
+def build_state_map(states):
+    """
+    Map the upper case name and abbreviation of every state in a name to abbreviation table to the abbreviation.
+    """
+    state_map = {}
+    for name, abbreviation in states.items():
+        state_map[name.upper()] = abbreviation
+    for abbreviation in states.values():
+        state_map.setdefault(abbreviation.upper(), abbreviation)
+    return state_map
+
+
+def shared_map(table, build):
+    """
+    Return build(table), building it only once for a table that can't change, such as the shared reference tables.
+    """
+    key = (id(table), build)
+    entry = _shared.get(key)
+    if entry is None:
+        with _lock:
+            entry = _shared.get(key)
+            if entry is None:
+                entry = _shared[key] = (table, build(table))
+    return entry[1]
@@ -29,6 +29,170 @@ import httplib
 import mimetypes
 import re
 import csv
+import errno
+import socket
+import sys
+import threading
+import urlparse
+from cache import normalize_key
+
+
+# Servers that passed check_version, by api base. Checked once per process instead of once per client.
+_checked_versions = set()
+_checked_lock = threading.Lock()
+
+
+def _dropped(error):
+    """
+    True if error means the server closed the connection before answering, as servers do with idle keep-alive
+    connections, rather than that the request timed out or failed.
+    """
+    if isinstance(error, httplib.BadStatusLine):
+        return True
+    if isinstance(error, socket.timeout):
+        return False
+    return isinstance(error, socket.error) and error.errno in (errno.ECONNRESET, errno.EPIPE)
+
+
+class ConnectionPool(object):
+    """
+    A thread safe pool of keep-alive HTTP connections to one server. Connections are reused across requests instead
+    of opening a new TCP connection for each one. At most size connections are open at once, callers beyond that wait
+    for one to be returned. timeout is the socket timeout in seconds, None for the global default.
+    """
+
+    def __init__(self, api_base, size=4, timeout=30):
+        parts = urlparse.urlsplit(api_base)
+        if parts.scheme == 'https':
+            self._connection_class = httplib.HTTPSConnection
+        else:
+            self._connection_class = httplib.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        # Path the api is mounted under, if any, e.g. /dstk for http://example.com/dstk.
+        self.prefix = parts.path.rstrip('/')
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        if self.timeout is None:
+            return self._connection_class(self.host, self.port)
+        return self._connection_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Send a request and return (status, body). A reused connection the server closed while it was idle is retried
+        once on a new connection. Timeouts and any other errors are raised right away, since the server may still be
+        working on the request.
+        """
+        headers = headers or {}
+        self._slots.acquire()
+        try:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = self._connect()
+                response = None
+                try:
+                    connection.request(method, self.prefix + path, body, headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                except (httplib.HTTPException, socket.error) as e:
+                    connection.close()
+                    connection = None
+                    if reused and response is None and _dropped(e):
+                        reused = False
+                        continue
+                    raise
+                break
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+            return response.status, data
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        Close the idle connections. Connections in use are closed when they are returned.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class _Flight(object):
+    """
+    One lookup in progress, waited on by every caller that wants the same key.
+    """
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent lookups of the same keys. A key that another thread is already looking up is waited for
+    instead of being looked up again, and its result is handed to every caller. coalesced counts the keys that were.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.coalesced = 0
+
+    def run(self, items, fetch):
+        """
+        items is a dict of keys to what to look them up with. fetch is called with a dict of the keys no other thread
+        is looking up, if any, and returns a dict of those keys to their results. Returns a dict of every key to its
+        result, raising the exception of the lookup that failed if one did.
+        """
+        own = {}
+        flights = {}
+        with self._lock:
+            for key, value in items.items():
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    own[key] = value
+                else:
+                    self.coalesced += 1
+                flights[key] = flight
+        if own:
+            fetched = {}
+            error = None
+            try:
+                fetched = fetch(own)
+            except Exception:
+                # Kept with its traceback, which a bare raise of the exception would lose on Python 2.
+                error = sys.exc_info()
+            # Every caller waiting on these keys is woken, whether the lookup worked or not.
+            with self._lock:
+                for key in own:
+                    flight = self._flights.pop(key)
+                    flight.result = fetched.get(key)
+                    flight.error = error
+                    flight.done.set()
+            if error is not None:
+                raise error[0], error[1], error[2]
+        results = {}
+        for key, flight in flights.items():
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error[0], flight.error[1], flight.error[2]
+            results[key] = flight.result
+        return results
 
 
 # This is the main interface class. You can see an example of it in use
@@ -42,12 +206,20 @@ class DSTK:
     api_base = None
 
     def __init__(self, options=None):
+        """
+        options can set apiBase, checkVersion, poolSize, the most connections to keep open to the server, timeout,
+        the socket timeout in seconds, and cache, a cache.GeocodeCache for street2coordinates results. Clients are
+        safe to share between threads.
+        """
         if options is None:
             options = {}
 
         defaultOptions = {
             'apiBase': 'http://www.datasciencetoolkit.org',
-            'checkVersion': True
+            'checkVersion': True,
+            'poolSize': 4,
+            'timeout': 30,
+            'cache': None
         }
 
         if 'DSTK_API_BASE' in os.environ:
@@ -58,6 +230,13 @@ class DSTK:
                 options[key] = value
 
         self.api_base = options['apiBase']
+        self.pool = ConnectionPool(self.api_base, options['poolSize'], options['timeout'])
+        self.cache = options['cache']
+        self.flights = SingleFlight()
+        # Addresses street2coordinates didn't send because they were repeats, ignoring case and whitespace, of
+        # others in the same call.
+        self.duplicates = 0
+        self._duplicates_lock = threading.Lock()
 
         if options['checkVersion']:
             self.check_version()
@@ -66,10 +245,13 @@ class DSTK:
 
         required_version = 40
 
+        if self.api_base in _checked_versions:
+            return
+
         api_url = self.api_base+'/info'
 
         try:
-            response_string = urllib.urlopen(api_url).read()
+            status, response_string = self.pool.request('GET', '/info')
             response = json.loads(response_string)
         except:
             raise Exception('The server at "'+self.api_base+'" doesn\'t seem to be running DSTK, no version information found.')
@@ -77,61 +259,82 @@ class DSTK:
         actual_version = response['version']
         if actual_version < required_version:
             raise Exception('DSTK: Version '+str(actual_version)+' found at "'+api_url+'" but '+str(required_version)+' is required')
+        with _checked_lock:
+            _checked_versions.add(self.api_base)
+
+    def _post(self, endpoint, api_body):
+        """
+        POST api_body to an endpoint, such as '/street2coordinates', over a pooled connection and return the decoded
+        JSON response. Raises an Exception with the server's error, if it returned one.
+        """
+        status, response_string = self.pool.request('POST', endpoint, api_body,
+                                                    {'Content-Type': 'application/x-www-form-urlencoded'})
+        try:
+            response = json.loads(response_string)
+        except ValueError:
+            raise Exception('DSTK: HTTP '+str(status)+' from "'+self.api_base+endpoint+'" was not JSON')
+
+        if isinstance(response, dict) and 'error' in response:
+            raise Exception(response['error'])
+
+        return response
+
+    def close(self):
+        self.pool.close()
 
     def ip2coordinates(self, ips):
 
         if not isinstance(ips, (list, tuple)):
             ips = [ips]
 
-        api_url = self.api_base+'/ip2coordinates'
-        api_body = json.dumps(ips)
-        response_string = urllib.urlopen(api_url, api_body).read()
-
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/ip2coordinates', json.dumps(ips))
 
     def street2coordinates(self, addresses):
+        """
+        Geocode addresses, returning a dict of each address to its result, or None. Addresses that are the same
+        ignoring case and whitespace are only sent once, and so are addresses another thread is already waiting on.
+        """
 
         if not isinstance(addresses, (list, tuple)):
             addresses = [addresses]
 
-        api_url = self.api_base+'/street2coordinates'
-        api_body = json.dumps(addresses)
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        keys = [normalize_key(address) for address in addresses]
+        unique = {}
+        for key, address in zip(keys, addresses):
+            unique.setdefault(key, address)
+        with self._duplicates_lock:
+            self.duplicates += len(addresses) - len(unique)
+
+        results = self.flights.run(unique, self._street2coordinates)
+        return dict((address, results[key]) for key, address in zip(keys, addresses))
+
+    def _street2coordinates(self, unique):
+        """
+        Look up a dict of keys to addresses, through the cache if there is one, and return a dict of the keys to the
+        results.
+        """
+        response = {}
+        misses = unique
+        if self.cache is not None:
+            response = self.cache.get_many(unique.values())
+            misses = dict((key, address) for key, address in unique.items() if address not in response)
+
+        if misses:
+            fetched = self._post('/street2coordinates', json.dumps(misses.values()))
+            results = [(address, fetched.get(address)) for address in misses.values()]
+            if self.cache is not None:
+                self.cache.set_many(results)
+            response.update(results)
+
+        return dict((key, response[address]) for key, address in unique.items())
 
     def coordinates2politics(self, coordinates):
 
-        api_url = self.api_base+'/coordinates2politics'
-        api_body = json.dumps(coordinates)
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/coordinates2politics', json.dumps(coordinates))
 
     def text2places(self, text):
 
-        api_url = self.api_base+'/text2places'
-        api_body = text
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/text2places', text)
 
     def file2text(self, file_name, file_data):
 
@@ -144,63 +347,23 @@ class DSTK:
 
     def text2sentences(self, text):
 
-        api_url = self.api_base+'/text2sentences'
-        api_body = text
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/text2sentences', text)
 
     def html2text(self, html):
 
-        api_url = self.api_base+'/html2text'
-        api_body = html
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/html2text', html)
 
     def html2story(self, html):
 
-        api_url = self.api_base+'/html2story'
-        api_body = html
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/html2story', html)
 
     def text2people(self, text):
 
-        api_url = self.api_base+'/text2people'
-        api_body = text
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/text2people', text)
 
     def text2times(self, text):
 
-        api_url = self.api_base+'/text2times'
-        api_body = text
-        response_string = urllib.urlopen(api_url, api_body).read()
-        response = json.loads(response_string)
-
-        if 'error' in response:
-            raise Exception(response['error'])
-
-        return response
+        return self._post('/text2times', text)
 
 # We need to post files as multipart form data, and Python has no native function for
 # that, so these utility functions implement what we need.
@@ -0,0 +1,241 @@
+# Non-blocking DSTK requests. This package is Python 2 only, so there is no asyncio: instead requests are queued to a
+# fixed set of threads sharing one pooled DSTK client, and callers get a Future back right away. Any number of
+# requests can be submitted at once, the number of threads bounds how many are sent at a time. Futures can be waited
+# on with a timeout, cancelled until they start, and given callbacks, so an event driven service can overlap
+# thousands of lookups without a thread per call.
+
+import Queue
+import threading
+import time
+
+
+class DSTKTimeout(Exception):
+    pass
+
+
+class CancelledError(Exception):
+    pass
+
+
+class Future(object):
+    """
+    The pending result of a request, with the same methods as concurrent.futures.Future. Callbacks added with
+    add_done_callback are called with the future when it finishes, in the thread that finished it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._running = False
+        self._cancelled = False
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+        # Futures to cancel along with this one, see chain and gather.
+        self._sources = ()
+
+    def cancel(self):
+        """
+        Cancel the request if it hasn't started yet. Returns True if it is cancelled.
+        """
+        with self._lock:
+            if self._cancelled:
+                return True
+            if self._running or self._done.is_set():
+                return False
+            self._cancelled = True
+            self._exception = CancelledError()
+        for source in self._sources:
+            source.cancel()
+        self._finish()
+        return True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def running(self):
+        return self._running and not self._done.is_set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def set_running_or_notify_cancel(self):
+        """
+        Mark the future as running, or return False if it was cancelled and shouldn't run.
+        """
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._running = True
+            return True
+
+    def set_result(self, result):
+        with self._lock:
+            if self._done.is_set() or self._cancelled:
+                return
+            self._result = result
+        self._finish()
+
+    def set_exception(self, exception):
+        with self._lock:
+            if self._done.is_set() or self._cancelled:
+                return
+            self._exception = exception
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def exception(self, timeout=None):
+        """
+        Wait up to timeout seconds, or forever if it is None, and return the exception the request raised, or None.
+        Raises DSTKTimeout if it isn't done in time.
+        """
+        if not self._done.wait(timeout):
+            raise DSTKTimeout("DSTK request still pending after {0}s.".format(timeout))
+        return self._exception
+
+    def result(self, timeout=None):
+        """
+        Wait up to timeout seconds, or forever if it is None, and return the result, raising the exception instead
+        if the request failed or was cancelled. Raises DSTKTimeout if it isn't done in time.
+        """
+        exception = self.exception(timeout)
+        if exception is not None:
+            raise exception
+        return self._result
+
+
+def chain(future, function):
+    """
+    A Future for function(future.result()), or for the exception either one raises. Cancelling it cancels future.
+    """
+    chained = Future()
+    chained._sources = (future,)
+
+    def done(source):
+        if source.cancelled():
+            chained.cancel()
+            return
+        try:
+            chained.set_result(function(source.result()))
+        except Exception as e:
+            chained.set_exception(e)
+    future.add_done_callback(done)
+    return chained
+
+
+def gather(futures, return_exceptions=False):
+    """
+    A Future for the list of the results of futures, in order. If return_exceptions is True, failed futures put
+    their exception in the list, otherwise the first failure fails the whole list. Cancelling it cancels every
+    future that hasn't started.
+    """
+    futures = list(futures)
+    gathered = Future()
+    gathered._sources = tuple(futures)
+    if not futures:
+        gathered.set_result([])
+        return gathered
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(future):
+        exception = future.exception()
+        if exception is not None and not return_exceptions:
+            gathered.set_exception(exception)
+            return
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        if return_exceptions:
+            gathered.set_result([f.exception() or f.result() for f in futures])
+        else:
+            gathered.set_result([f.result() for f in futures])
+    for future in futures:
+        future.add_done_callback(done)
+    return gathered
+
+
+class AsyncDSTK(object):
+    """
+    Runs calls on concurrency threads, by default one per pooled connection of client, a dstk.DSTK, and returns a
+    Future for each. timeout is the default number of seconds a request may wait in the queue before it fails with
+    DSTKTimeout instead of being sent. Once sent, the client's socket timeout applies.
+    """
+
+    def __init__(self, client, concurrency=None, timeout=None):
+        self.client = client
+        self.concurrency = concurrency or client.pool.size
+        self.timeout = timeout
+        self._queue = Queue.Queue()
+        self._threads = []
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name="dstk-async-{0}".format(i))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, function, args=(), timeout=None):
+        """
+        Queue function(*args) and return a Future for its result. timeout overrides the default queue timeout.
+        """
+        future = Future()
+        if timeout is None:
+            timeout = self.timeout
+        deadline = None if timeout is None else time.time() + timeout
+        self._queue.put((future, function, args, deadline))
+        return future
+
+    def street2coordinates(self, addresses, timeout=None):
+        """
+        A Future for the client's street2coordinates of addresses.
+        """
+        return self.submit(self.client.street2coordinates, (addresses,), timeout)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, function, args, deadline = item
+            if deadline is not None and time.time() > deadline:
+                future.set_exception(DSTKTimeout("DSTK request timed out before it was sent."))
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def close(self, cancel=False, wait=True):
+        """
+        Stop the threads once the queued requests are done, or cancel the queued requests first if cancel is True.
+        If wait is True, wait for the threads to finish.
+        """
+        if cancel:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except Queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for thread in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
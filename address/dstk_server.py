@@ -0,0 +1,195 @@
+# A local stand-in for a Data Science Toolkit server, for testing and benchmarking the dstk backend without a real
+# one. It answers /info and /street2coordinates over keep-alive HTTP/1.1. Addresses in a fixture file get the response
+# stored for them, anything else is parsed with the default backend and placed at its zip or city centroid from
+# zipcodes.csv, so the same address always gets the same response. Latency and failures can be injected.
+#
+#   python -m address.dstk_server --port 8080 --latency 0.02 --error-rate 0.01
+
+import argparse
+import BaseHTTPServer
+import json
+import random
+import SocketServer
+import sys
+import threading
+import time
+from address_parser import AddressParser
+from cache import normalize_key
+import geocode
+
+# The version /info reports, new enough for dstk.DSTK.check_version.
+VERSION = 50
+
+
+def load_fixtures(filename):
+    """
+    Read a fixture file, a JSON object of addresses to the street2coordinates result to return for them, or null.
+    """
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+class DSTKHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Buffer each response and send it in one write when the request is done. Unbuffered, the status line, every
+    # header and the body go out as separate packets, and Nagle's algorithm holds them for the client's delayed ACK.
+    wbufsize = -1
+
+    def _reply(self, status, response):
+        body = json.dumps(response)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/info":
+            self._reply(200, {"version": VERSION})
+        else:
+            self._reply(404, {"error": "Unknown endpoint {0}".format(self.path)})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path != "/street2coordinates":
+            self._reply(404, {"error": "Unknown endpoint {0}".format(self.path)})
+            return
+        try:
+            addresses = json.loads(body)
+        except ValueError:
+            self._reply(400, {"error": "Request body is not JSON"})
+            return
+        if not isinstance(addresses, list):
+            addresses = [addresses]
+        delay, fail = self.server.next_request(len(addresses))
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._reply(500, {"error": "Injected failure"})
+            return
+        self._reply(200, dict((address, self.server.street2coordinates(address)) for address in addresses))
+
+    def log_message(self, *args):
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, *args)
+
+
+class DSTKServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    The stand-in server, on host and port, 0 for any free port. fixtures is a dict of addresses to results, see
+    load_fixtures. Each /street2coordinates request waits latency seconds, plus up to jitter more, and fails with
+    HTTP 500 with probability error_rate. Delays and failures come from a random generator seeded with seed.
+    requests, addresses and errors count what has been served.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, fixtures=None, latency=0, jitter=0, error_rate=0, seed=0,
+                 verbose=False):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), DSTKHandler)
+        self.fixtures = dict((normalize_key(address), result) for address, result in (fixtures or {}).items())
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self.requests = 0
+        self.addresses = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        # Cities and states are filled in from the zip, like a real geocoder would.
+        self.parser = AddressParser(cache_size=10000, enrich=True, geocode=True)
+
+    @property
+    def api_base(self):
+        host, port = self.server_address[:2]
+        return "http://{0}:{1}".format(host, port)
+
+    def next_request(self, addresses):
+        """
+        Count a request for a number of addresses and return (delay in seconds, whether it should fail).
+        """
+        with self._lock:
+            self.requests += 1
+            self.addresses += addresses
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def street2coordinates(self, address):
+        """
+        The result for one address: its fixture if it has one, otherwise one made from parsing it, or None if it
+        doesn't parse or can't be placed.
+        """
+        key = normalize_key(address)
+        if key in self.fixtures:
+            return self.fixtures[key]
+        try:
+            parsed = self.parser.parse_address(address)
+        except Exception:
+            return None
+        if parsed.lat is None:
+            return None
+        street_name = " ".join(part for part in (parsed.street_prefix, parsed.street, parsed.street_suffix) if part)
+        return {
+            "street_address": parsed.house_number + " " + street_name,
+            "street_number": parsed.house_number,
+            "street_name": street_name,
+            "locality": parsed.city,
+            "region": parsed.state,
+            "country_code": "US",
+            "country_code3": "USA",
+            "country_name": "United States",
+            "fips_county": None,
+            "latitude": parsed.lat,
+            "longitude": parsed.lng,
+            # Placing an address at its zip is better than at its city.
+            "confidence": 0.9 if parsed.geocode_precision == geocode.ZIP else 0.7,
+        }
+
+    def start(self):
+        """
+        Serve from a background thread and return self.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m address.dstk_server",
+                                     description="Serve a local stand-in for a DSTK server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fixtures", help="JSON file of addresses to street2coordinates results.")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds to wait before each response.")
+    parser.add_argument("--jitter", type=float, default=0, help="Up to this many more seconds, at random.")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests that fail with HTTP 500.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the latency and error randomness.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    server = DSTKServer(args.host, args.port, fixtures, args.latency, args.jitter, args.error_rate, args.seed,
+                        args.verbose)
+    sys.stderr.write("Serving DSTK stand-in at {0}\n".format(server.api_base))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# Local enrichment from zipcodes.csv. Every zip belongs to a city and state, so an address with a zip doesn't need a
+# geocoder round trip to get them: missing cities and states are filled in from the zip, and ones that were parsed
+# are checked against it.
+
+from gazetteer import WORD_ALIASES
+
+# Spellings of a word to the one used in keys, e.g. "st" to "saint", so "St. Paul" and "Saint Paul" are the same
+# place.
+_ALIASES = dict((word, group[0]) for group in WORD_ALIASES for word in group)
+
+
+def city_key(city):
+    """
+    The form cities are compared in: lowercase, no periods, single spaces and abbreviations spelled out.
+    """
+    return ' '.join(_ALIASES.get(word, word) for word in city.replace('.', '').lower().split())
+
+
+class PlaceIndex(object):
+    """
+    The reverse of a ZipTable: (city, state) to the zips in that city. Cities are matched with city_key and states
+    are postal abbreviations.
+    """
+
+    def __init__(self, zips):
+        places = {}
+        keys = [city_key(city) for city in zips.cities]
+        for zip_code, city, state in zips.places():
+            place = (keys[city], zips.states[state])
+            entry = places.get(place)
+            # Tuples of ints are invisible to the garbage collector once built, lists aren't.
+            places[place] = (zip_code,) if entry is None else entry + (zip_code,)
+        self._places = places
+        self._zips = zips
+        # City centroids by key, worked out on first use.
+        self._centroids = {}
+
+    def zips_for(self, city, state):
+        """
+        The zips of a city as zero padded strings, in order, or an empty list if the city isn't in the zip table.
+        """
+        return ["%05d" % zip_code for zip_code in self._places.get((city_key(city), state.upper()), ())]
+
+    def centroid(self, city, state):
+        """
+        The (lat, lng) of a city, the average of the centroids of its zips, or None if the city isn't in the zip table.
+        """
+        place = (city_key(city), state.upper())
+        centroid = self._centroids.get(place)
+        if centroid is None:
+            zip_codes = self._places.get(place)
+            if not zip_codes:
+                return None
+            points = [self._zips.coordinates(self._zips.index(zip_code)) for zip_code in zip_codes]
+            centroid = self._centroids[place] = (sum(lat for lat, lng in points) / len(points),
+                                                 sum(lng for lat, lng in points) / len(points))
+        return centroid
+
+    def __contains__(self, place):
+        city, state = place
+        return (city_key(city), state.upper()) in self._places
+
+    def __len__(self):
+        return len(self._places)
+
+
+def enrich_address(address, zips, places):
+    """
+    Fill in the city and state of an Address or ParsedAddress from its zip, and check the ones it already has. The
+    names of filled in fields are set in address.enriched. Fields that disagree with the zip are set in
+    address.zip_mismatch, which is ("zip",) instead if the zip isn't in the table. A city only disagrees if the
+    zip's city is a different one and the zip isn't one of the parsed city's own zips either, since a zip's city in
+    zipcodes.csv is only its main city. Returns address.
+    """
+    if not address.zip:
+        return address
+    i = zips.index(address.zip[0:5])
+    if i < 0:
+        address.zip_mismatch = ('zip',)
+        return address
+    city, state = zips.place(i)
+    enriched = []
+    mismatch = []
+    if not address.state:
+        address.state = state
+        enriched.append('state')
+    elif address.state.upper() != state:
+        mismatch.append('state')
+    if not address.city:
+        address.city = city
+        enriched.append('city')
+    elif city_key(address.city) != city_key(city) and \
+            address.zip[0:5] not in places.zips_for(address.city, address.state):
+        mismatch.append('city')
+    address.enriched = tuple(enriched)
+    address.zip_mismatch = tuple(mismatch)
+    return address
+
+
+def enrich_many(results, parser):
+    """
+    Enrich the addresses in an iterable of ParseResults, as yielded by AddressParser.parse_many, using the parser's
+    zip table, and yield the results again. Failed results are passed through.
+    """
+    zips = parser.zips
+    places = parser.place_index
+    for result in results:
+        if result.address is not None:
+            enrich_address(result.address, zips, places)
+        yield result
@@ -0,0 +1,218 @@
+# Approximate name matching for the street and city lists. Comparing a misspelled token against tens of thousands of
+# names one by one is far too slow, so names are indexed with the symmetric delete method: every string reachable by
+# deleting up to max_distance characters from a name points back to it. A misspelling within max_distance edits of a
+# name shares at least one of those deletes with it, so a lookup only generates the deletes of the query, collects
+# the names they point to and checks the real edit distance of those few candidates.
+
+# How many leading characters of each name are indexed by default.
+PREFIX_LENGTH = 7
+# A query is allowed at most one edit per this many characters, so short tokens like state codes and suffixes don't
+# match every name within an edit or two of them.
+CHARS_PER_EDIT = 4
+
+
+def edit_distance(a, b, max_distance=None):
+    """
+    The optimal string alignment distance between a and b: the number of single character insertions, deletions,
+    substitutions and adjacent transpositions needed to turn one into the other. If max_distance is given, returns
+    max_distance + 1 as soon as the distance is known to be larger, which is much faster for distant strings.
+    """
+    if a == b:
+        return 0
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # Common prefixes and suffixes don't change the distance.
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a = a[start:end_a]
+    b = b[start:end_b]
+    if not a or not b:
+        distance = len(a) or len(b)
+        if max_distance is not None and distance > max_distance:
+            return max_distance + 1
+        return distance
+
+    len_a, len_b = len(a), len(b)
+    # Without a limit every cell is needed. With one, only cells within max_distance of the diagonal can lead to a
+    # distance in range, everything outside that band is treated as too far.
+    band = max(len_a, len_b) if max_distance is None else max_distance
+    too_far = band + 1
+    before = None
+    previous = [j if j <= band else too_far for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        current = [too_far] * (len_b + 1)
+        if i <= band:
+            current[0] = i
+        row_min = too_far
+        a_char = a[i - 1]
+        for j in range(max(1, i - band), min(len_b, i + band) + 1):
+            cost = 0 if a_char == b[j - 1] else 1
+            value = previous[j - 1] + cost
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and a_char == b[j - 2] and a[i - 2] == b[j - 1] and before[j - 2] + 1 < value:
+                value = before[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > band:
+            return too_far
+        before, previous = previous, current
+    distance = previous[len_b]
+    if max_distance is not None and distance > max_distance:
+        return max_distance + 1
+    return distance
+
+
+def deletes(word, max_distance):
+    """
+    The set of strings made by deleting up to max_distance characters from word, including word itself.
+    """
+    found = set([word])
+    level = [word]
+    for distance in range(max_distance):
+        next_level = []
+        for item in level:
+            for i in range(len(item)):
+                shorter = item[:i] + item[i + 1:]
+                if shorter not in found:
+                    found.add(shorter)
+                    next_level.append(shorter)
+        level = next_level
+    return found
+
+
+def normalize(name):
+    """
+    The form names and queries are compared in: lowercase, no periods and single spaces between words.
+    """
+    return ' '.join(name.replace('.', '').lower().split())
+
+
+def _combinations(n, k):
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def prefix_length_for(names, max_distance, max_entries, longest=PREFIX_LENGTH):
+    """
+    The longest prefix length, up to longest, for which an index of names needs at most max_entries deletes. This is
+    an upper bound on the size of the index, which is what its memory use grows with. Shorter prefixes make for a
+    smaller index with more candidates to check per lookup. Never less than max_distance + 1, even if that doesn't
+    fit.
+    """
+    lengths = {}
+    for name in names:
+        length = len(normalize(name))
+        lengths[length] = lengths.get(length, 0) + 1
+    for prefix_length in range(longest, max_distance, -1):
+        entries = 0
+        for length, count in lengths.items():
+            length = min(length, prefix_length)
+            entries += count * sum(_combinations(length, k) for k in range(min(length, max_distance) + 1))
+        if entries <= max_entries:
+            return prefix_length
+    return max_distance + 1
+
+
+class FuzzyIndex(object):
+    """
+    A symmetric delete index over a set of names. lookup() finds the closest name within max_distance edits of a
+    query in time that depends on the length of the query, not on the number of names.
+
+    Only the deletes of the first prefix_length characters of each name are indexed. Misspellings further in are
+    still found, since candidates are checked against the whole name, and it keeps the index to a few entries per name
+    even for long names. To bound memory use, pass max_entries and the prefix length is picked to fit, see
+    prefix_length_for.
+    """
+
+    def __init__(self, names=(), max_distance=2, prefix_length=PREFIX_LENGTH, max_entries=None):
+        if max_entries:
+            names = list(names)
+            prefix_length = prefix_length_for(names, max_distance, max_entries, prefix_length)
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.max_entries = max_entries
+        # Normalized name to the name as added, only for names that differ from their normalized form.
+        self._names = {}
+        # Delete to the normalized name it came from, or a tuple of them when several share a delete. Tuples of strings
+        # aren't tracked by the garbage collector, lists would make every collection walk the whole index.
+        self._deletes = {}
+        self.max_words = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        key = normalize(name)
+        if not key:
+            return
+        if key != name:
+            self._names.setdefault(key, name)
+        self.max_words = max(self.max_words, key.count(' ') + 1)
+        index = self._deletes
+        for delete in deletes(key[:self.prefix_length], self.max_distance):
+            entry = index.get(delete)
+            if entry is None:
+                index[delete] = key
+            elif isinstance(entry, tuple):
+                if key not in entry:
+                    index[delete] = entry + (key,)
+            elif entry != key:
+                index[delete] = (entry, key)
+
+    def candidates(self, query, max_distance):
+        """
+        The normalized names that may be within max_distance edits of the normalized query.
+        """
+        found = set()
+        index = self._deletes
+        for delete in deletes(query[:self.prefix_length], max_distance):
+            entry = index.get(delete)
+            if entry is None:
+                continue
+            if isinstance(entry, tuple):
+                found.update(entry)
+            else:
+                found.add(entry)
+        return found
+
+    def lookup(self, query, max_distance=None):
+        """
+        Return a tuple of (name, distance) for the name closest to query, or (None, None) if no name is within
+        max_distance edits. max_distance defaults to, and can't be more than, the distance the index was built for.
+        Ties go to the alphabetically first name, so results don't depend on the order names were added. Queries
+        shorter than CHARS_PER_EDIT characters per edit are allowed fewer edits.
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        query = normalize(query)
+        if not query:
+            return None, None
+        max_distance = min(max_distance, len(query) // CHARS_PER_EDIT)
+        # Every name within n edits shares a delete of depth n or less with the query, so close matches are found
+        # from the few deletes of depth 1 before trying the many of depth max_distance.
+        for limit in range(min(1, max_distance), max_distance + 1):
+            best = None
+            best_distance = limit + 1
+            for key in self.candidates(query, limit):
+                if abs(len(key) - len(query)) > best_distance:
+                    continue
+                distance = edit_distance(query, key, best_distance)
+                if distance < best_distance or (distance == best_distance and best is not None and key < best):
+                    best = key
+                    best_distance = distance
+            if best is not None and best_distance <= limit:
+                return self._names.get(best, best), best_distance
+        return None, None
+
+    def __len__(self):
+        return len(self._deletes)
@@ -0,0 +1,177 @@
+# Indexed place name lookups. The packaged city list has ~30k entries, so anything slower than a hash lookup per
+# token shows up immediately when parsing large batches.
+
+from fuzzy import FuzzyIndex
+
+# Abbreviations that are interchangeable inside place names. Every spelling in a group gets its own edge in the trie,
+# so "saint paul", "st paul" and "st. paul" all reach the same city without any special casing at lookup time.
+WORD_ALIASES = [
+    ('saint', 'st'),
+    ('fort', 'ft'),
+    ('mount', 'mt'),
+]
+
+# Trie nodes are plain dicts keyed by word. No word is ever empty, so the empty key holds the name ending at a node.
+# Most names don't continue past their first word, so a node holding nothing but a name is stored as the name itself.
+_NAME = ''
+
+
+class Gazetteer(object):
+    """
+    A collection of lowercase place names with constant time membership tests. It behaves enough like the list it
+    replaces that `name in parser.cities`, iteration, len() and append() keep working.
+
+    Names are also indexed in a word level trie built from the last word backwards, which lets Address find the
+    longest name at the end of a run of tokens in a single walk, e.g. "wisconsin rapids" from [..., 'wisconsin',
+    'rapids'].
+    """
+
+    def __init__(self, names=None, aliases=WORD_ALIASES):
+        self.frozen = False
+        self._names = set()
+        self._trie = {}
+        self._aliases = {}
+        # FuzzyIndex of the names for each max_entries budget, built on the first fuzzy lookup with that budget.
+        self._fuzzy = {}
+        for group in aliases:
+            for word in group:
+                self._aliases[word] = group
+        if names:
+            self.extend(names)
+
+    def add(self, name):
+        """
+        Add a single name. Names are stored stripped and lowercased, matching how tokens are looked up.
+        """
+        if self.frozen:
+            raise TypeError("This gazetteer is read-only. Copy it with Gazetteer(gazetteer) to add names.")
+        name = name.strip().lower()
+        if not name or name in self._names:
+            return
+        self._names.add(name)
+        self._fuzzy = {}
+        node = self._trie
+        # Address strips periods before tokenizing, so index "st. paul" under "st" and "paul".
+        words = name.replace('.', '').split()
+        last = len(words) - 1
+        for i, word in enumerate(reversed(words)):
+            variants = self._aliases.get(word, (word,))
+            child = None
+            for variant in variants:
+                child = node.get(variant)
+                if child is not None:
+                    break
+            if i == last:
+                # The first spelling added wins, so "saint louis" and "st. louis" keep whichever the file lists first.
+                if child is None:
+                    child = name
+                elif isinstance(child, dict):
+                    child.setdefault(_NAME, name)
+            elif child is None:
+                child = {}
+            elif not isinstance(child, dict):
+                child = {_NAME: child}
+            for variant in variants:
+                node[variant] = child
+            node = child
+
+    # cities used to be a plain list, keep list style additions working.
+    append = add
+
+    def extend(self, names):
+        for name in names:
+            self.add(name)
+
+    def load(self, filename):
+        """
+        Add every name from a file with one name per line.
+        """
+        with open(filename, 'r') as f:
+            for line in f:
+                self.add(line)
+
+    def get_state(self):
+        """
+        Everything needed to rebuild this gazetteer without re-adding every name, made only of types marshal can
+        store. Used by the reference snapshot.
+        """
+        return {'names': self._names, 'trie': self._trie, 'aliases': self._aliases, 'frozen': self.frozen}
+
+    @classmethod
+    def from_state(cls, state):
+        gazetteer = cls(aliases=())
+        gazetteer._names = state['names']
+        gazetteer._trie = state['trie']
+        gazetteer._aliases = state['aliases']
+        gazetteer.frozen = state['frozen']
+        return gazetteer
+
+    def freeze(self):
+        """
+        Make the gazetteer read-only. Used for the copy shared by every parser in the process.
+        """
+        self.frozen = True
+
+    def lookup(self, words):
+        """
+        Given a list of lowercase words, return the place name they make up, or None. Abbreviations in WORD_ALIASES
+        are interchangeable, so ['saint', 'paul'] returns "st. paul" if that is how the name was added.
+        """
+        start, name = self.match_tail(words, len(words) - 1)
+        if start == 0:
+            return name
+        return None
+
+    def match_tail(self, words, end, start=0):
+        """
+        Find the longest place name made up of words[i:end + 1] for start <= i <= end. words should be lowercase
+        with periods removed. Returns a tuple of (i, name), or (None, None) if no name ends at words[end].
+        """
+        node = self._trie
+        match = (None, None)
+        i = end
+        while i >= start:
+            node = node.get(words[i])
+            if node is None:
+                break
+            if not isinstance(node, dict):
+                return (i, node)
+            if _NAME in node:
+                match = (i, node[_NAME])
+            i -= 1
+        return match
+
+    def fuzzy_index(self, max_distance, max_entries=None):
+        """
+        The FuzzyIndex of every name, built the first time it is needed. One index is kept per max_entries memory
+        budget, since the shared tables are used by parsers with different budgets, and rebuilt if a larger
+        max_distance is asked for.
+        """
+        index = self._fuzzy.get(max_entries)
+        if index is None or index.max_distance < max_distance:
+            index = self._fuzzy[max_entries] = FuzzyIndex(self._names, max_distance, max_entries=max_entries)
+        return index
+
+    def fuzzy_match_tail(self, words, end, start=0, max_distance=1, max_entries=None):
+        """
+        Like match_tail, but also finds names misspelled by up to max_distance edits. Returns a tuple of (i, name,
+        distance), or (None, None, None) if nothing is close enough. The closest name wins, and between equally close
+        names the one made of more words. max_entries is passed on to fuzzy_index.
+        """
+        index = self.fuzzy_index(max_distance, max_entries)
+        match = (None, None, None)
+        first = max(start, end - index.max_words + 1)
+        for i in range(end, first - 1, -1):
+            name, distance = index.lookup(' '.join(words[i:end + 1]), max_distance)
+            if name is not None and (match[2] is None or distance <= match[2]):
+                match = (i, name, distance)
+        return match
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
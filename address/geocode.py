@@ -0,0 +1,55 @@
+# Offline geocoding from zipcodes.csv. The table has a centroid for every zip, which is close enough for anything that
+# doesn't need rooftop accuracy, so coordinates can come from the zip, or from the average of a city's zips when there
+# is no zip, instead of a DSTK round trip per address.
+
+# Values of Address.geocode_precision, from most to least precise.
+# Coordinates of the street address, from DSTK.
+STREET = 'street'
+# The centroid of the zip.
+ZIP = 'zip'
+# The average of the centroids of every zip in the city.
+CITY = 'city'
+
+
+def zip_centroid(zips, zip_code):
+    """
+    The (lat, lng) of a zip, given as a string or int, or None if it isn't in the table.
+    """
+    i = zips.index(zip_code)
+    if i < 0:
+        return None
+    return zips.coordinates(i)
+
+
+def geocode_address(address, zips, places):
+    """
+    Set the lat, lng and geocode_precision of an Address or ParsedAddress from its zip, or from its city and state
+    if the zip is missing or unknown. Addresses that already have coordinates, such as from the dstk backend, are
+    left alone, and so are ones neither locates. Returns address.
+    """
+    if address.lat is not None and address.lng is not None:
+        return address
+    coordinates = None
+    if address.zip:
+        coordinates = zip_centroid(zips, address.zip[0:5])
+        precision = ZIP
+    if coordinates is None and address.city and address.state:
+        coordinates = places.centroid(address.city, address.state)
+        precision = CITY
+    if coordinates is not None:
+        address.lat, address.lng = coordinates
+        address.geocode_precision = precision
+    return address
+
+
+def geocode_many(results, parser):
+    """
+    Geocode the addresses in an iterable of ParseResults, as yielded by AddressParser.parse_many, using the parser's
+    zip table, and yield the results again. Failed results are passed through.
+    """
+    zips = parser.zips
+    places = parser.place_index
+    for result in results:
+        if result.address is not None:
+            geocode_address(result.address, zips, places)
+        yield result
@@ -0,0 +1,165 @@
+# Parallel batch parsing. Parsing is pure Python and CPU bound, so large batches are split into chunks and handed to
+# a pool of worker processes. Each worker gets its own copy of the parser once, when it starts. Workers are forked
+# after the parent has loaded the reference tables, so they share those pages instead of loading or unpickling the
+# tables again. Only the address strings and compact ParsedAddress results cross between processes.
+#
+# Work that waits on the network instead, like DSTK requests, runs on a pool of threads with map_threads.
+
+import itertools
+import multiprocessing
+import multiprocessing.pool
+import sys
+import threading
+from address import Address
+
+# The parser used inside a worker process, set once by _init_worker.
+_parser = None
+
+
+def _init_worker(parser):
+    global _parser
+    _parser = parser
+
+
+def _parse_chunk(chunk):
+    start, addresses = chunk
+    return list(_parser.parse_many(addresses, start, compact=True))
+
+
+def _chunks(addresses, chunk_size):
+    """
+    Split an iterable into (start line number, list of addresses) tuples of at most chunk_size addresses. If the
+    iterable raises, the addresses read before it are yielded first.
+    """
+    addresses = iter(addresses)
+    start = 0
+    while True:
+        chunk = []
+        try:
+            for address in itertools.islice(addresses, chunk_size):
+                chunk.append(address)
+        except Exception:
+            error = sys.exc_info()
+            if chunk:
+                yield start, chunk
+            raise error[0], error[1], error[2]
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+class _Throttle(object):
+    """
+    Wraps the chunk generator so the pool only reads ahead a fixed number of chunks. The pool's task thread would
+    otherwise read the whole input into memory as fast as it can.
+
+    The input is read in the pool's task thread, where an exception would kill the thread and leave the pool waiting
+    forever. Instead the chunks stop there and the exception is kept for the consuming thread to raise with check.
+    """
+
+    def __init__(self, chunks, limit):
+        self._chunks = chunks
+        self._slots = threading.Semaphore(limit)
+        self._stopped = False
+        self._error = None
+
+    def __iter__(self):
+        chunks = iter(self._chunks)
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            except Exception:
+                self._error = sys.exc_info()
+                return
+            self._slots.acquire()
+            if self._stopped:
+                return
+            yield chunk
+
+    def done(self):
+        """
+        A chunk has been consumed, let another one in.
+        """
+        self._slots.release()
+
+    def check(self):
+        """
+        Raise the exception reading the input raised, if it did, with its original traceback. Called once every chunk
+        read before it has been consumed.
+        """
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error[0], error[1], error[2]
+
+    def stop(self):
+        """
+        Stop feeding chunks, waking the pool's task thread if it is waiting for a slot.
+        """
+        self._stopped = True
+        self._slots.release()
+
+
+def parse_parallel(parser, addresses, workers=None, chunk_size=500, ordered=True, compact=False):
+    """
+    Parse an iterable of addresses with a pool of worker processes, yielding a ParseResult for each, like
+    AddressParser.parse_many.
+
+    workers defaults to the number of CPUs. Addresses are sent to workers chunk_size at a time, and at most two
+    chunks per worker are read ahead of what has been yielded, so memory stays flat for any size of input. If ordered
+    is False, chunks are yielded as soon as they finish instead of in input order. Results within a chunk are always
+    in order, and line_number always refers to the position in the input.
+
+    Workers always send back ParsedAddress results. Unless compact is True they are turned back into Address objects
+    attached to parser, without parsing them again. If iterating over addresses raises, the exception is raised here
+    after the results of every address before it.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    # Load everything before forking so the workers share it.
+    parser.preload()
+    throttle = _Throttle(_chunks(addresses, chunk_size), workers * 2)
+    pool = multiprocessing.Pool(workers, _init_worker, (parser,))
+    try:
+        if ordered:
+            chunk_results = pool.imap(_parse_chunk, throttle)
+        else:
+            chunk_results = pool.imap_unordered(_parse_chunk, throttle)
+        for results in chunk_results:
+            throttle.done()
+            for result in results:
+                if result.address is not None and not compact:
+                    result = result._replace(address=Address.from_result(result.address, parser, parser.logger))
+                yield result
+        throttle.check()
+    finally:
+        # Let the workers finish the chunks they already have and exit. Pool.terminate() can deadlock on Python 2
+        # when workers are idle.
+        throttle.stop()
+        pool.close()
+        pool.join()
+
+
+def map_threads(function, addresses, chunk_size=100, concurrency=4):
+    """
+    Call function on every (start line number, list of addresses) chunk of an iterable of addresses, running up to
+    concurrency calls at once on a pool of threads, and yield the items of the lists it returns. For work that waits
+    on I/O, such as DSTK requests, where threads overlap the waiting.
+
+    Chunks are yielded in input order as soon as they and every chunk before them are done, and at most two chunks
+    per thread are read ahead of what has been yielded. If iterating over addresses raises, the exception is raised
+    here after the items of every chunk before it.
+    """
+    throttle = _Throttle(_chunks(addresses, chunk_size), concurrency * 2)
+    pool = multiprocessing.pool.ThreadPool(concurrency)
+    try:
+        for results in pool.imap(function, throttle):
+            throttle.done()
+            for result in results:
+                yield result
+        throttle.check()
+    finally:
+        throttle.stop()
+        pool.close()
+        pool.join()
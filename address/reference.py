@@ -0,0 +1,171 @@
+# Process wide store for the reference tables packaged with pyaddress. Each table is read from disk the first time it
+# is asked for and the same read-only copy is handed to every AddressParser after that, so creating parsers in a long
+# running process costs neither file reads nor memory. Tables are read from the binary snapshot (see snapshot.py)
+# when one can be used, and from the CSVs otherwise.
+
+import logging
+import os
+import threading
+from gazetteer import Gazetteer
+from zipcodes import ZipTable
+import snapshot
+
+cwd = os.path.dirname(os.path.realpath(__file__))
+logger = logging.getLogger(__name__)
+
+_tables = {}
+_lock = threading.Lock()
+# The open Snapshot, False if snapshots can't be used, None until the first table is loaded.
+_snapshot = None
+
+
+class FrozenDict(dict):
+    """
+    A dict that refuses to be changed after it is created. Shared tables use this so that one parser can't change
+    the lookups of every other parser in the process.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Shared reference tables are read-only. Pass your own table to AddressParser instead.")
+
+    __setitem__ = _immutable
+    __delitem__ = _immutable
+    clear = _immutable
+    pop = _immutable
+    popitem = _immutable
+    setdefault = _immutable
+    update = _immutable
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def read_suffixes(filename):
+    """
+    Read a suffix file into a dict. The keys will be possible long versions, and the values will be the accepted
+    abbreviations.
+    """
+    suffixes = {}
+    with open(filename, 'r') as f:
+        for line in f:
+            # Make sure we have key and value
+            if len(line.split(',')) != 2:
+                continue
+            # Strip off newlines.
+            key, value = line.strip().split(',')
+            suffixes[key] = value
+    return suffixes
+
+
+def read_cities(filename):
+    """
+    Read a city file, one city per line, into a Gazetteer.
+    """
+    cities = Gazetteer()
+    cities.load(filename)
+    return cities
+
+
+def read_streets(filename):
+    """
+    Read a street file, one street per line, into a list of lowercase street names.
+    """
+    with open(filename, 'r') as f:
+        return [line.strip().lower() for line in f]
+
+
+def read_zips(filename):
+    """
+    Read the zip code file into a ZipTable.
+    """
+    return ZipTable.read(filename)
+
+
+_readers = {
+    'suffixes': read_suffixes,
+    'cities': read_cities,
+    'streets': read_streets,
+    'zips': read_zips,
+}
+
+
+def read_all():
+    """
+    Read every packaged table straight from its CSV, returning a dict of table name to table.
+    """
+    return dict((name, _readers[name](os.path.join(cwd, source))) for name, source in snapshot.SOURCES)
+
+
+def _share(name, table):
+    """
+    Make a freshly loaded table read-only before handing it to every parser.
+    """
+    if name == 'suffixes':
+        return FrozenDict(table)
+    if name == 'cities':
+        table.freeze()
+        return table
+    if name == 'streets':
+        return tuple(table)
+    return table
+
+
+def _read(name):
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = snapshot.open_snapshot(read_all) or False
+    if _snapshot:
+        try:
+            return _snapshot.load(name)
+        except Exception as e:
+            # Fall back to the CSV, the snapshot will be rebuilt by the next process.
+            logger.warning("Can't load %s from reference snapshot %s, reading the CSV instead: %s", name,
+                           _snapshot.path, e)
+    return _readers[name](os.path.join(cwd, dict(snapshot.SOURCES)[name]))
+
+
+def _load(name):
+    table = _tables.get(name)
+    if table is None:
+        with _lock:
+            # Another thread may have finished loading while we waited.
+            table = _tables.get(name)
+            if table is None:
+                table = _share(name, _read(name))
+                _tables[name] = table
+    return table
+
+
+def is_shared(table):
+    """
+    True if table is one of the shared tables, which never change.
+    """
+    return any(table is shared for shared in _tables.values())
+
+
+def suffixes():
+    """
+    The shared, read-only suffix dict from suffixes.csv.
+    """
+    return _load('suffixes')
+
+
+def cities():
+    """
+    The shared, read-only city Gazetteer from cities.csv.
+    """
+    return _load('cities')
+
+
+def streets():
+    """
+    The shared, read-only street list from streets.csv, as a tuple.
+    """
+    return _load('streets')
+
+
+def zips():
+    """
+    The shared zip code ZipTable from zipcodes.csv.
+    """
+    return _load('zips')
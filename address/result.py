@@ -0,0 +1,98 @@
+# Compact parse results. An Address carries a __dict__, its parser, its logger and the scratch state used while
+# parsing, which adds up when a batch keeps millions of them. ParsedAddress keeps only the parsed fields in slots and
+# pickles as a plain tuple, so it is also what worker processes send back to the parent.
+
+
+def format_address(address):
+    """
+    Join the fields of an Address or ParsedAddress into a human readable address.
+    """
+    addr = ""
+    if address.house_number:
+        addr = addr + address.house_number
+    if address.street_prefix:
+        addr = addr + " " + address.street_prefix
+    if address.street:
+        addr = addr + " " + address.street
+    if address.street_suffix:
+        addr = addr + " " + address.street_suffix
+    if address.apartment:
+        addr = addr + " " + address.apartment
+    if address.city:
+        addr = addr + ", " + address.city
+    if address.state:
+        addr = addr + ", " + address.state
+    if address.zip:
+        addr = addr + " " + address.zip
+    return addr
+
+
+class ParsedAddress(object):
+    """
+    The parsed fields of an Address and nothing else. Fields that weren't found are None, unmatched is True if some
+    tokens couldn't be placed, and confidence is only set by the dstk backend. lat and lng come from the dstk backend
+    or geocoding, with geocode_precision saying which, see the geocode module. fuzzy_matches lists the fields
+    corrected by fuzzy matching, see Address.fuzzy_matches, and enriched and zip_mismatch are set by enrichment, see
+    the enrich module.
+    """
+    FIELDS = ('house_number', 'street_prefix', 'street', 'street_suffix', 'apartment', 'city', 'state', 'zip',
+              'original', 'lat', 'lng', 'confidence', 'unmatched', 'line_number', 'fuzzy_matches',
+              'enriched', 'zip_mismatch', 'geocode_precision')
+    __slots__ = FIELDS
+    # Defaults for fields that weren't passed, matching the Address class attributes.
+    _defaults = {'confidence': -1, 'unmatched': False, 'line_number': -1, 'fuzzy_matches': (), 'enriched': (),
+                 'zip_mismatch': ()}
+
+    def __init__(self, *args, **kwargs):
+        if len(args) > len(self.FIELDS):
+            raise TypeError("ParsedAddress takes at most {0} fields.".format(len(self.FIELDS)))
+        for name, value in zip(self.FIELDS, args):
+            setattr(self, name, value)
+        for name in self.FIELDS[len(args):]:
+            setattr(self, name, kwargs.pop(name, self._defaults.get(name)))
+        if kwargs:
+            raise TypeError("Unknown ParsedAddress fields: {0}".format(", ".join(sorted(kwargs))))
+
+    @classmethod
+    def from_address(cls, address):
+        """
+        Copy the parsed fields out of an Address, or anything else with the same attributes.
+        """
+        return cls(*[getattr(address, name) for name in cls.FIELDS])
+
+    def _replace(self, **fields):
+        """
+        Return a copy with the given fields changed, like namedtuple._replace.
+        """
+        values = self.as_dict()
+        values.update(fields)
+        return self.__class__(**values)
+
+    def as_tuple(self):
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.FIELDS)
+
+    def full_address(self):
+        """
+        Print the address in a human readable format
+        """
+        return format_address(self)
+
+    def __reduce__(self):
+        # Pickle as the class and a flat tuple of values, without field names.
+        return self.__class__, self.as_tuple()
+
+    def __eq__(self, other):
+        return isinstance(other, ParsedAddress) and self.as_tuple() == other.as_tuple()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def __repr__(self):
+        return "ParsedAddress({0})".format(", ".join("{0}={1!r}".format(name, getattr(self, name))
+                                                     for name in self.FIELDS if getattr(self, name) is not None))
@@ -0,0 +1,172 @@
+# Precompiled binary snapshot of the packaged reference tables. Parsing cities.csv, suffixes.csv, streets.csv and
+# zipcodes.csv line by line takes a noticeable part of a second, while unmarshalling the finished tables takes a few
+# milliseconds. The reference module builds the snapshot the first time it needs a table and rebuilds it whenever one
+# of the CSVs is newer than the snapshot.
+#
+# The snapshot is written to the user's cache directory by default, $XDG_CACHE_HOME/pyaddress or ~/.cache/pyaddress,
+# never into the installed package. Set PYADDRESS_SNAPSHOT to use another path, or to an empty string to turn
+# snapshots off. If the path can't be written the tables are read from the CSVs as before, and a warning is logged.
+# To build it ahead of time, e.g. while building a container image, run:
+#
+#   python -m address.snapshot
+
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import tempfile
+from gazetteer import Gazetteer
+from zipcodes import ZipTable
+
+cwd = os.path.dirname(os.path.realpath(__file__))
+logger = logging.getLogger(__name__)
+
+MAGIC = 'pyaddress-snapshot'
+# Bump whenever the stored layout of any table changes.
+FORMAT_VERSION = 1
+# Table name to the CSV it is built from, in the order they are stored.
+SOURCES = [
+    ('suffixes', 'suffixes.csv'),
+    ('cities', 'cities.csv'),
+    ('streets', 'streets.csv'),
+    ('zips', 'zipcodes.csv'),
+]
+TABLES = [name for name, source in SOURCES]
+
+
+def default_path():
+    """
+    Where the snapshot lives, or None if snapshots are turned off. The default name includes a hash of where this
+    package is installed, so installs with different CSVs don't share a snapshot.
+    """
+    path = os.environ.get('PYADDRESS_SNAPSHOT')
+    if path is not None:
+        return path or None
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    install = hashlib.sha1(cwd).hexdigest()[:12]
+    return os.path.join(cache_dir, 'pyaddress', 'reference-{0}.snapshot'.format(install))
+
+
+def _header():
+    # marshal's format and array's byte layout both depend on the interpreter and machine, so a snapshot is only
+    # valid for the kind of interpreter that wrote it.
+    return (MAGIC, FORMAT_VERSION, tuple(sys.version_info[:2]), sys.byteorder)
+
+
+def _encode(name, table):
+    if name in ('cities', 'zips'):
+        return table.get_state()
+    if name == 'suffixes':
+        return dict(table)
+    return list(table)
+
+
+def _decode(name, data):
+    if name == 'cities':
+        return Gazetteer.from_state(data)
+    if name == 'zips':
+        return ZipTable.from_state(data)
+    return data
+
+
+def is_stale(path=None, source_dir=cwd):
+    """
+    True if the snapshot at path doesn't exist or is older than any of the CSVs it is built from.
+    """
+    path = path or default_path()
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    for name, source in SOURCES:
+        source = os.path.join(source_dir, source)
+        if os.path.exists(source) and os.path.getmtime(source) > built:
+            return True
+    return False
+
+
+def build(tables, path=None):
+    """
+    Write a snapshot of tables, a dict of table name to table as returned by the reference module, to path. The file
+    is written to a temporary name and renamed into place, so readers never see a half written snapshot.
+    """
+    path = path or default_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    sections = []
+    toc = {}
+    offset = 0
+    for name in TABLES:
+        section = marshal.dumps(_encode(name, tables[name]))
+        toc[name] = (offset, len(section))
+        offset += len(section)
+        sections.append(section)
+    fd, temp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(_header() + (toc,), f)
+            for section in sections:
+                f.write(section)
+        # mkstemp only lets the owner read the file.
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path
+
+
+class Snapshot(object):
+    """
+    An open snapshot file. Only the header is read up front, each table is unmarshalled when it is loaded so lazily
+    loaded tables such as the zips stay lazy.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        with open(self.path, 'rb') as f:
+            header = marshal.load(f)
+            self._start = f.tell()
+        if not isinstance(header, tuple) or header[:-1] != _header():
+            raise ValueError("{0} is not a snapshot for this version of pyaddress and Python.".format(self.path))
+        self._toc = header[-1]
+
+    def load(self, name):
+        """
+        Load one table by name, one of TABLES.
+        """
+        offset, length = self._toc[name]
+        with open(self.path, 'rb') as f:
+            f.seek(self._start + offset)
+            return _decode(name, marshal.loads(f.read(length)))
+
+
+def open_snapshot(read_tables, path=None):
+    """
+    Open the snapshot at path, building it first with read_tables() if it is missing, stale or was written by
+    another interpreter. Returns None if snapshots are turned off or the snapshot can't be written or read.
+    """
+    path = path or default_path()
+    if path is None:
+        return None
+    for attempt in range(2):
+        try:
+            if attempt or is_stale(path):
+                build(read_tables(), path)
+            return Snapshot(path)
+        except (IOError, OSError) as e:
+            logger.warning("Can't use reference snapshot %s, reading the CSVs instead: %s", path, e)
+            return None
+        except (ValueError, EOFError, TypeError) as e:
+            # Unreadable or written by another interpreter, rebuild it once.
+            logger.warning("Rebuilding unreadable reference snapshot %s: %s", path, e)
+            continue
+    logger.warning("Can't use reference snapshot %s after rebuilding it, reading the CSVs instead.", path)
+    return None
+
+
+if __name__ == '__main__':
+    import reference
+    print "Wrote", build(reference.read_all())
@@ -113,6 +113,13 @@ class AddressTest(unittest.TestCase):
         self.assertEqual('San Francisco', addr.city)
         self.assertEqual('#400', addr.apartment)
     
+    def test_abbreviated_multi_word_city(self):
+        addr = Address('100 Main St, Ft Dodge, IA', self.parser)
+        self.assertEqual('Main', addr.street)
+        self.assertEqual('St.', addr.street_suffix)
+        self.assertEqual('Fort Dodge', addr.city)
+        self.assertEqual('IA', addr.state)
+
     def test_street_postdirection(self):
         addr = Address('12006 120th Pl NE, Kirkland, WA', self.parser)
         self.assertEqual('NE', addr.post_direction)
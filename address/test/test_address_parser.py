@@ -1,5 +1,7 @@
 import unittest
-from address import AddressParser
+from address import AddressParser, ParsedAddress
+from address.address import InvalidAddressException
+from StringIO import StringIO
 import os
 
 cwd = os.path.dirname(os.path.dirname((os.path.realpath(__file__))))
@@ -19,16 +21,90 @@ class AddressParserTest(unittest.TestCase):
     def test_load_states(self):
         self.assertEqual(self.ap.states["Wisconsin"], "WI")
     
+    def test_zips_lazy(self):
+        self.assertEqual(self.ap._zips, None)
+        self.ap.preload()
+        self.assertEqual(self.ap.zips["53703"]["city"], "Madison")
+
     def test_load_zips(self):
         self.ap.load_zips(os.path.join(cwd, "zipcodes.csv"))
         last = self.ap.zips["99950"]
         self.assertEqual(last["zip"], "99950")
         self.assertEqual(last["city"], "Ketchikan")
         self.assertEqual(last["state"], "AK")
-        self.assertEqual(last["lat"], "55.875767")
-        self.assertEqual(last["lng"], "-131.46633")
-        self.assertEqual(last["timezone"], "-9")
+        self.assertEqual(last["lat"], 55.875767)
+        self.assertEqual(last["lng"], -131.46633)
+        self.assertEqual(last["timezone"], -9)
         self.assertEqual(last["dst"], True)
+        self.assertFalse("zip" in self.ap.zips)
     
+    def test_parse_address(self):
+        addr = self.ap.parse_address("2 N. Park Street, Madison, WI 53703")
+        self.assertEqual(addr.street, "Park")
+        self.assertEqual(addr.city, "Madison")
+
+    def test_parse_many(self):
+        results = list(self.ap.parse_many(["2 N. Park Street, Madison, WI 53703\n", "Madison, WI", "230 Lakelawn"]))
+        self.assertEqual([result.line_number for result in results], [0, 1, 2])
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[0].original, "2 N. Park Street, Madison, WI 53703")
+        self.assertEqual(results[0].address.street, "Park")
+        self.assertFalse(results[1].ok)
+        self.assertEqual(results[1].address, None)
+        self.assertTrue(isinstance(results[1].error, InvalidAddressException))
+        self.assertEqual(results[2].address.street, "Lakelawn")
+
+    def test_parse_many_bad_rows(self):
+        for ap in (self.ap, AddressParser(cache_size=10)):
+            results = list(ap.parse_many([None, "230 Lakelawn", 42]))
+            self.assertEqual([result.ok for result in results], [False, True, False])
+            self.assertEqual(results[0].original, None)
+            self.assertTrue(isinstance(results[0].error, TypeError))
+            self.assertTrue(isinstance(results[2].error, TypeError))
+
+    def test_parse_many_file(self):
+        results = self.ap.parse_many(StringIO("230 Lakelawn\n504 W. Washington Ave.\n"))
+        self.assertEqual([result.address.street for result in results], ["Lakelawn", "Washington"])
+
+    def test_parse_parallel(self):
+        addresses = ["2 N. Park Street, Madison, WI 53703", "Madison, WI", "230 Lakelawn", "504 W. Washington Ave."] * 5
+        expected = [(result.line_number, result.ok, result.address and result.address.full_address())
+                    for result in self.ap.parse_many(addresses)]
+        results = list(self.ap.parse_parallel(addresses, workers=2, chunk_size=3))
+        self.assertEqual([(result.line_number, result.ok, result.address and result.address.full_address())
+                          for result in results], expected)
+        self.assertTrue(results[0].address.parser is self.ap)
+        unordered = self.ap.parse_parallel(addresses, workers=2, chunk_size=3, ordered=False)
+        self.assertEqual(sorted((result.line_number, result.ok) for result in unordered),
+                         [(line_number, ok) for line_number, ok, full_address in expected])
+
+    def test_parse_parallel_input_error(self):
+        def addresses():
+            for i in range(7):
+                yield "{0} Lakelawn".format(i + 1)
+            raise ValueError("bad row")
+        for ordered in (True, False):
+            results = []
+            try:
+                for result in self.ap.parse_parallel(addresses(), workers=2, chunk_size=3, ordered=ordered):
+                    results.append(result)
+            except ValueError as e:
+                self.assertEqual(str(e), "bad row")
+            else:
+                self.fail("ValueError not raised")
+            self.assertEqual(sorted(result.address.house_number for result in results), [str(i + 1) for i in range(7)])
+
+    def test_parse_compact(self):
+        addresses = ["2 N. Park Street, Madison, WI 53703", "Madison, WI"]
+        results = list(self.ap.parse_many(addresses, compact=True))
+        self.assertTrue(isinstance(results[0].address, ParsedAddress))
+        self.assertEqual(results[0].address.full_address(), "2 N. Park St., Madison, WI 53703")
+        self.assertEqual(results[1].address, None)
+        parallel = list(self.ap.parse_parallel(addresses * 3, workers=2, chunk_size=2, compact=True))
+        self.assertEqual([result.address and result.address.line_number for result in parallel],
+                         [0, None, 2, None, 4, None])
+        self.assertTrue(isinstance(parallel[2].address, ParsedAddress))
+        self.assertEqual(parallel[2].address.full_address(), results[0].address.full_address())
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import csv
+import json
+from StringIO import StringIO
+from address import bulk
+
+
+class BulkTest(unittest.TestCase):
+    def run_bulk(self, argv, stdin):
+        stdout = StringIO()
+        stderr = StringIO()
+        code = bulk.main(argv, StringIO(stdin), stdout, stderr)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_text_to_csv(self):
+        code, out, err = self.run_bulk([], "2 N. Park Street, Madison, WI 53703\nMadison, WI\n")
+        self.assertEqual(code, 0)
+        rows = list(csv.DictReader(StringIO(out)))
+        self.assertEqual(rows[0]["street"], "Park")
+        self.assertEqual(rows[0]["city"], "Madison")
+        self.assertEqual(rows[1]["error"], "Addresses must have house numbers.")
+        self.assertTrue("Parsed 2 addresses" in err)
+        self.assertTrue("Invalid: 1 (50.00%)" in err)
+
+    def test_csv_column_to_jsonl(self):
+        stdin = "id,address\n1,230 Lakelawn\n2,\"504 W. Washington Ave., Madison, WI\"\n"
+        code, out, err = self.run_bulk(["-f", "csv", "-c", "address", "-t", "jsonl"], stdin)
+        rows = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([row["street"] for row in rows], ["Lakelawn", "Washington"])
+        self.assertEqual(rows[1]["line_number"], 1)
+
+    def test_jsonl_input(self):
+        code, out, err = self.run_bulk(["-f", "jsonl", "-t", "jsonl"], '{"address": "230 Lakelawn"}\n')
+        self.assertEqual(json.loads(out)["street"], "Lakelawn")
+
+    def test_missing_column(self):
+        code, out, err = self.run_bulk(["-f", "csv", "-c", "street"], "address\n230 Lakelawn\n")
+        self.assertEqual(code, 2)
+        self.assertTrue("Column street" in err)
+
+    def test_bad_input_with_workers(self):
+        for workers in ("1", "2"):
+            code, out, err = self.run_bulk(["-f", "csv", "-c", "street", "-w", workers], "address\n230 Lakelawn\n")
+            self.assertEqual(code, 2)
+            self.assertEqual(out, "")
+            self.assertTrue("Column street" in err)
+            stdin = '{"address": "230 Lakelawn"}\n{"address": "504 W. Washington Ave."}\nnot json\n'
+            code, out, err = self.run_bulk(["-f", "jsonl", "-t", "jsonl", "-w", workers, "--chunk-size", "1"],
+                                           stdin)
+            self.assertEqual(code, 2)
+            self.assertEqual([json.loads(line)["street"] for line in out.splitlines()], ["Lakelawn", "Washington"])
+            self.assertTrue("Line 3 is not JSON" in err)
+
+    def test_jsonl_not_object(self):
+        for line in ('["230 Lakelawn"]', '"230 Lakelawn"', '5'):
+            code, out, err = self.run_bulk(["-f", "jsonl", "-t", "jsonl"], line + "\n")
+            self.assertEqual(code, 2)
+            self.assertTrue("Line 1 is not a JSON object" in err)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from address import AddressParser
+from address.address import InvalidAddressException
+from address.cache import GeocodeCache, ParseCache, normalize_key
+
+
+class ParseCacheTest(unittest.TestCase):
+    def test_normalize_key(self):
+        self.assertEqual(normalize_key("  2 N. Park  STREET,\tMadison "), "2 n. park street, madison")
+
+    def test_lru(self):
+        cache = ParseCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        # b is now the least recently used.
+        cache.put('c', 3)
+        self.assertFalse('b' in cache)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.info(), (1, 1, 1, 2, 2))
+
+    def test_pickle(self):
+        cache = ParseCache(5)
+        cache.put('a', 1)
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(copy.maxsize, 5)
+        self.assertEqual(len(copy), 0)
+        copy.put('b', 2)
+        self.assertEqual(copy.get('b'), 2)
+
+
+class ParserCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.ap = AddressParser(cache_size=10)
+
+    def test_off_by_default(self):
+        self.assertEqual(AddressParser().cache_info(), None)
+
+    def test_hit(self):
+        first = self.ap.parse_address("2 N. Park Street, Madison, WI 53703", line_number=1)
+        second = self.ap.parse_address("2 n. park  street, MADISON, wi 53703", line_number=2)
+        self.assertEqual(second.full_address(), first.full_address())
+        self.assertEqual(second.original, "2 n. park  street, MADISON, wi 53703")
+        self.assertEqual(second.line_number, 2)
+        self.assertTrue(second.parser is self.ap)
+        info = self.ap.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+    def test_results_are_copies(self):
+        self.ap.parse_address("2 N. Park Street, Madison, WI 53703").street = "Lake"
+        self.assertEqual(self.ap.parse_address("2 N. Park Street, Madison, WI 53703").street, "Park")
+
+    def test_invalid_cached(self):
+        for i in range(3):
+            self.assertRaises(InvalidAddressException, self.ap.parse_address, "Madison, WI")
+        self.assertEqual(self.ap.cache_info().hits, 2)
+
+    def test_parse_many(self):
+        addresses = ["2 N. Park Street, Madison, WI 53703", "Madison, WI"] * 3
+        results = list(self.ap.parse_many(addresses, compact=True))
+        self.assertEqual([result.ok for result in results], [True, False] * 3)
+        self.assertEqual([result.address.line_number for result in results if result.ok], [0, 2, 4])
+        self.assertEqual(self.ap.cache_info().hits, 4)
+
+    def test_load_clears(self):
+        self.ap.parse_address("2 N. Park Street, Madison, WI 53703")
+        self.ap.load_streets(__file__)
+        self.assertEqual(self.ap.cache_info().currsize, 0)
+
+
+class GeocodeCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = GeocodeCache()
+
+    def test_get_set(self):
+        self.cache.set_many({"2 Park St": {"latitude": 43.0}, "Nowhere": None})
+        found = self.cache.get_many(["2  PARK st", "Nowhere", "3 Park St"])
+        self.assertEqual(found, {"2  PARK st": {"latitude": 43.0}, "Nowhere": None})
+        self.assertEqual(self.cache.get("3 Park St", "missing"), "missing")
+        info = self.cache.info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 2, 2))
+
+    def test_ttl(self):
+        cache = GeocodeCache(ttl=60)
+        cache.set("2 Park St", {"latitude": 43.0})
+        cache._db.execute("UPDATE geocodes SET stored = ?", (time.time() - 120,))
+        self.assertEqual(cache.get_many(["2 Park St"]), {})
+        self.assertEqual(cache.info().expired, 1)
+        self.assertEqual(cache.purge_expired(), 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_eviction(self):
+        cache = GeocodeCache(maxsize=3)
+        for i in range(5):
+            cache.set("{0} Park St".format(i), i)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.info().evictions, 2)
+        self.assertEqual(sorted(cache.get_many(["{0} Park St".format(i) for i in range(5)]).values()), [2, 3, 4])
+
+    def test_batches(self):
+        addresses = ["{0} Park St".format(i) for i in range(1200)]
+        self.cache.set_many((address, i) for i, address in enumerate(addresses))
+        self.assertEqual(len(self.cache.get_many(addresses)), 1200)
+
+    def test_persistent(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "geocodes.db")
+            cache = GeocodeCache(path)
+            cache.set(u"2 Caf\xe9 St", {"latitude": 43.0})
+            cache.close()
+            self.assertEqual(GeocodeCache(path).get(u"2 caf\xe9 st"), {"latitude": 43.0})
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from address import Address, AddressParser, canonical
+from address.address_parser import PREFIXES
+
+
+class CanonicalTest(unittest.TestCase):
+    def test_suffix_map(self):
+        suffix_map = canonical.build_suffix_map({"AVENUE": "AVE", "AVE": "AVE", "STREET": "ST"})
+        self.assertEqual(suffix_map["AVENUE"], "AVE")
+        self.assertEqual(suffix_map["AVE."], "AVE")
+        self.assertEqual(suffix_map["ST"], "ST")
+        self.assertEqual(suffix_map["ST."], "ST")
+        self.assertFalse("avenue" in suffix_map)
+
+    def test_suffix_keys_win(self):
+        # A key that is also another entry's abbreviation maps like the key, as it always has.
+        suffix_map = canonical.build_suffix_map({"CT": "CTS", "COURT": "CT"})
+        self.assertEqual(suffix_map["CT"], "CTS")
+        self.assertEqual(suffix_map["COURT"], "CT")
+
+    def test_prefix_map(self):
+        prefix_map = canonical.build_prefix_map(PREFIXES)
+        for spelling in ("n", "n.", "north", "north."):
+            self.assertEqual(prefix_map[spelling], "N.")
+        self.assertEqual(prefix_map["ne."], "NE.")
+
+    def test_state_map(self):
+        state_map = canonical.build_state_map({"Wisconsin": "WI", "New York": "NY"})
+        self.assertEqual(state_map["WISCONSIN"], "WI")
+        self.assertEqual(state_map["WI"], "WI")
+        self.assertEqual(state_map["NEW YORK"], "NY")
+
+
+class ParserMapTest(unittest.TestCase):
+    def test_shared(self):
+        self.assertTrue(AddressParser().suffix_map is AddressParser().suffix_map)
+
+    def test_custom_suffixes(self):
+        ap = AddressParser(suffixes={"PASSAGE": "PSGE"})
+        self.assertEqual(ap.suffix_map, {"PASSAGE": "PSGE", "PSGE": "PSGE", "PASSAGE.": "PSGE", "PSGE.": "PSGE"})
+        addr = ap.parse_address("2 Park Passage, Madison, WI 53703")
+        self.assertEqual(addr.street_suffix, "Psge.")
+        ap.suffixes = {"WAY": "WAY"}
+        self.assertEqual(ap.parse_address("2 Park Way, Madison, WI 53703").street_suffix, "Way.")
+
+    def test_custom_states(self):
+        ap = AddressParser()
+        ap.states = {"Ontario": "ON"}
+        self.assertEqual(ap.parse_address("2 Park St, Toronto, Ontario").state, "ON")
+        self.assertEqual(AddressParser().state_map["WISCONSIN"], "WI")
+
+    def test_period_spellings(self):
+        addr = Address(None, AddressParser())
+        self.assertTrue(addr.check_street_suffix("Ave."))
+        self.assertEqual(addr.street_suffix, "Ave.")
+
+
+if __name__ == '__main__':
+    unittest.main()
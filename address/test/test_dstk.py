@@ -0,0 +1,337 @@
+import BaseHTTPServer
+import json
+import socket
+import SocketServer
+import sys
+import threading
+import time
+import traceback
+import unittest
+from address import DSTKAddressParser
+from address import dstk
+from address import parallel
+from address.cache import GeocodeCache
+from address.address import InvalidAddressException
+from address.dstk_async import CancelledError, DSTKTimeout, Future, gather
+
+
+def _geocode(address):
+    """
+    A DSTK street2coordinates result for "<number> Gorham St, Madison, WI", or None for other addresses.
+    """
+    number = address.split()[0]
+    if not address.endswith("Gorham St, Madison, WI"):
+        return None
+    return {"confidence": 0.9, "street_address": number + " Gorham St", "street_number": number,
+            "street_name": "Gorham St", "locality": "Madison", "region": "WI", "latitude": 43.08, "longitude": -89.37}
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def _reply(self, response):
+        body = json.dumps(response)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        self._reply({"version": 50})
+
+    def do_POST(self):
+        self.server.requests.append(self.path)
+        addresses = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.bodies.append(addresses)
+        if self.path == "/error":
+            self._reply({"error": "Bad request"})
+            return
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.most_in_flight = max(self.server.most_in_flight, self.server.in_flight)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        self._reply(dict((address, _geocode(address)) for address in addresses))
+        # Drop the connection without telling the client, like a server closing idle keep-alive connections.
+        self.close_connection = self.server.drop_connections
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class DSTKClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = _Server(("127.0.0.1", 0), _Handler)
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.bodies = []
+        self.server.lock = threading.Lock()
+        self.server.in_flight = self.server.most_in_flight = 0
+        self.server.delay = 0
+        self.server.drop_connections = False
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.daemon = True
+        self.thread.start()
+        with dstk._checked_lock:
+            dstk._checked_versions.clear()
+        self.api_base = "http://127.0.0.1:{0}".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        client = dstk.DSTK({'apiBase': self.api_base})
+        for i in range(5):
+            self.assertTrue("1 Main St" in client.street2coordinates("1 Main St"))
+        client.close()
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.requests, ["/info"] + ["/street2coordinates"] * 5)
+
+    def test_version_checked_once(self):
+        dstk.DSTK({'apiBase': self.api_base})
+        dstk.DSTK({'apiBase': self.api_base})
+        self.assertEqual(self.server.requests, ["/info"])
+
+    def test_error(self):
+        client = dstk.DSTK({'apiBase': self.api_base, 'checkVersion': False})
+        self.assertRaises(Exception, client._post, "/error", "[]")
+
+    def test_pool_size(self):
+        client = dstk.DSTK({'apiBase': self.api_base, 'poolSize': 2, 'timeout': 5})
+        threads = [threading.Thread(target=client.street2coordinates, args=("1 Main St",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(self.server.connections <= 2)
+
+    def test_parser(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base, dstk_pool_size=2, cache_size=10)
+        self.assertEqual(ap.backend, "dstk")
+        self.assertEqual(ap.dstk.pool.size, 2)
+        self.assertTrue(ap.cache is not None)
+        addresses = ap.dstk_multi_address(["2722 Gorham St, Madison, WI"])
+        self.assertEqual(addresses[0].street, "Gorham")
+        self.assertEqual(addresses[0].geocode_precision, "street")
+
+    def test_chunks(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base)
+        addresses = ["{0} Gorham St, Madison, WI".format(i + 1) for i in range(250)]
+        addresses[10] = "1 Nowhere Rd, Madison, WI"
+        results = list(ap.dstk_parse_many(addresses, chunk_size=100, compact=True))
+        self.assertEqual(self.server.requests, ["/info"] + ["/street2coordinates"] * 3)
+        self.assertEqual([result.line_number for result in results], range(250))
+        self.assertEqual([result.original for result in results], addresses)
+        self.assertTrue(results[10].error is not None)
+        self.assertEqual(results[11].address.house_number, "12")
+        self.assertEqual(len([result for result in results if result.ok]), 249)
+        self.assertEqual(len(ap.dstk_multi_address(addresses, chunk_size=100)), 249)
+
+    def test_concurrency(self):
+        self.server.delay = 0.05
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base, dstk_pool_size=3)
+        addresses = ["{0} Gorham St, Madison, WI".format(i + 1) for i in range(12)]
+        results = list(ap.dstk_parse_many(addresses, chunk_size=1))
+        self.assertEqual([result.address.house_number for result in results], [str(i + 1) for i in range(12)])
+        self.assertEqual(self.server.most_in_flight, 3)
+
+    def test_bad_rows(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base)
+        addresses = ["1 Gorham St, Madison, WI", None, 7, "2 Gorham St, Madison, WI"]
+        results = list(ap.dstk_parse_many(addresses, chunk_size=1))
+        self.assertEqual([result.ok for result in results], [True, False, False, True])
+        self.assertTrue(isinstance(results[1].error, TypeError))
+        self.assertEqual(results[2].original, 7)
+        results = ap.dstk_parse_many_async(addresses, chunk_size=2).result(5)
+        self.assertEqual([result.ok for result in results], [True, False, False, True])
+        self.assertEqual(self.server.bodies, [[address] for address in addresses[::3]] + [addresses[:1], addresses[3:]])
+
+    def test_input_error(self):
+        def addresses():
+            for i in range(5):
+                yield "{0} Gorham St, Madison, WI".format(i + 1)
+            raise ValueError("bad row")
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base)
+        results = []
+        try:
+            for result in ap.dstk_parse_many(addresses(), chunk_size=2):
+                results.append(result)
+        except ValueError as e:
+            self.assertEqual(str(e), "bad row")
+        else:
+            self.fail("ValueError not raised")
+        self.assertEqual([result.address.house_number for result in results], ["1", "2", "3", "4", "5"])
+        results = parallel.map_threads(lambda chunk: chunk[1], addresses(), 2, 2)
+        self.assertRaises(ValueError, list, results)
+
+    def test_dropped_connection_retried(self):
+        client = dstk.DSTK({'apiBase': self.api_base, 'checkVersion': False})
+        self.server.drop_connections = True
+        for i in range(3):
+            self.assertEqual(client.street2coordinates("1 Gorham St, Madison, WI").values()[0]["street_number"], "1")
+        self.assertEqual(self.server.requests, ["/street2coordinates"] * 3)
+
+    def test_timeout_not_retried(self):
+        client = dstk.DSTK({'apiBase': self.api_base, 'checkVersion': False, 'timeout': 0.3})
+        client.street2coordinates("1 Gorham St, Madison, WI")
+        self.server.delay = 1
+        start = time.time()
+        self.assertRaises(socket.timeout, client.street2coordinates, "2 Gorham St, Madison, WI")
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual(self.server.requests, ["/street2coordinates"] * 2)
+
+    def test_request_error(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base, dstk_timeout=5)
+        self.server.shutdown()
+        self.server.server_close()
+        # Drop the connection left open by the version check.
+        ap.dstk.close()
+        results = list(ap.dstk_parse_many(["1 Gorham St, Madison, WI", "2 Gorham St, Madison, WI"]))
+        self.assertEqual([result.ok for result in results], [False, False])
+
+
+    def test_parse_address(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base)
+        self.assertEqual(ap.parse_address("5 Gorham St, Madison, WI").house_number, "5")
+        self.assertRaises(InvalidAddressException, ap.parse_address, "5 Nowhere Rd, Madison, WI")
+
+    def test_parse_address_async(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base)
+        futures = [ap.parse_address_async("{0} Gorham St, Madison, WI".format(i + 1)) for i in range(10)]
+        self.assertEqual([future.result(5).house_number for future in futures], [str(i + 1) for i in range(10)])
+        future = ap.parse_address_async("5 Nowhere Rd, Madison, WI")
+        self.assertTrue(isinstance(future.exception(5), InvalidAddressException))
+        self.assertRaises(InvalidAddressException, future.result)
+
+    def test_timeout_and_cancel(self):
+        self.server.delay = 0.2
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base, dstk_concurrency=1)
+        first = ap.parse_address_async("1 Gorham St, Madison, WI")
+        timed_out = ap.parse_address_async("2 Gorham St, Madison, WI", timeout=0.05)
+        cancelled = ap.parse_address_async("3 Gorham St, Madison, WI")
+        self.assertRaises(DSTKTimeout, first.result, 0.01)
+        self.assertTrue(cancelled.cancel())
+        self.assertEqual(first.result(5).house_number, "1")
+        self.assertFalse(first.cancel())
+        self.assertTrue(isinstance(timed_out.exception(5), DSTKTimeout))
+        self.assertRaises(CancelledError, cancelled.result)
+        self.assertEqual(self.server.requests, ["/info", "/street2coordinates"])
+
+    def test_parse_many_async(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base)
+        addresses = ["{0} Gorham St, Madison, WI".format(i + 1) for i in range(25)]
+        addresses[3] = "1 Nowhere Rd, Madison, WI"
+        results = ap.dstk_parse_many_async(addresses, chunk_size=10, compact=True).result(5)
+        self.assertEqual([result.original for result in results], addresses)
+        self.assertEqual([result.ok for result in results].count(False), 1)
+        self.assertEqual(len(ap.dstk_multi_address_async(addresses, chunk_size=10).result(5)), 24)
+
+    def test_gather(self):
+        futures = [Future(), Future()]
+        gathered = gather(futures, return_exceptions=True)
+        futures[1].set_exception(ValueError())
+        self.assertFalse(gathered.done())
+        futures[0].set_result(1)
+        self.assertEqual(gathered.result()[0], 1)
+        self.assertTrue(isinstance(gathered.result()[1], ValueError))
+        futures = [Future(), Future()]
+        self.assertTrue(gather(futures).cancel())
+        self.assertTrue(futures[0].cancelled() and futures[1].cancelled())
+
+
+    def test_cache(self):
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.api_base, dstk_cache=GeocodeCache())
+        addresses = ["{0} Gorham St, Madison, WI".format(i + 1) for i in range(5)] + ["1 Nowhere Rd, Madison, WI"]
+        self.assertEqual(len(ap.dstk_multi_address(addresses[:3])), 3)
+        self.assertEqual(len(ap.dstk_multi_address(addresses)), 5)
+        self.assertEqual(len(ap.dstk_multi_address(addresses)), 5)
+        self.assertEqual(len(self.server.requests), 3)
+        info = ap.dstk_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (9, 6, 6))
+
+
+    def test_duplicates(self):
+        client = dstk.DSTK({'apiBase': self.api_base, 'checkVersion': False})
+        addresses = ["1 Gorham St, Madison, WI", "2 Gorham St, Madison, WI", "1  gorham st, MADISON, WI",
+                     "1 Gorham St, Madison, WI"]
+        response = client.street2coordinates(addresses)
+        self.assertEqual(sorted(self.server.bodies[0]), addresses[:2])
+        self.assertEqual(client.duplicates, 2)
+        self.assertEqual(response["1  gorham st, MADISON, WI"]["street_number"], "1")
+        self.assertEqual(response["2 Gorham St, Madison, WI"]["street_number"], "2")
+
+    def test_duplicates_threads(self):
+        client = dstk.DSTK({'apiBase': self.api_base, 'checkVersion': False})
+        addresses = ["1 Gorham St, Madison, WI"] * 3
+        threads = [threading.Thread(target=client.street2coordinates, args=(addresses,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(client.duplicates, 16)
+
+    def test_coalescing(self):
+        self.server.delay = 0.2
+        client = dstk.DSTK({'apiBase': self.api_base, 'checkVersion': False})
+        responses = []
+
+        def lookup(addresses):
+            responses.append(client.street2coordinates(addresses))
+        first = threading.Thread(target=lookup, args=(["1 Gorham St, Madison, WI"],))
+        second = threading.Thread(target=lookup, args=(["1 GORHAM ST, Madison, WI", "2 Gorham St, Madison, WI"],))
+        first.start()
+        time.sleep(0.05)
+        second.start()
+        first.join()
+        second.join()
+        self.assertEqual(self.server.bodies, [["1 Gorham St, Madison, WI"], ["2 Gorham St, Madison, WI"]])
+        self.assertEqual(client.flights.coalesced, 1)
+        self.assertEqual(sorted(len(response) for response in responses), [1, 2])
+
+    def test_single_flight_error(self):
+        flights = dstk.SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fetch(items):
+            started.set()
+            release.wait()
+            raise ValueError("down")
+
+        def run():
+            try:
+                flights.run({"a": "A"}, fetch)
+            except ValueError as e:
+                errors.append((e, sys.exc_info()[2]))
+        leader = threading.Thread(target=run)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=run)
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(flights.coalesced, 1)
+        # Both callers get the leader's traceback, ending in fetch.
+        for error, tb in errors:
+            self.assertEqual(traceback.extract_tb(tb)[-1][2], "fetch")
+        self.assertEqual(flights.run({"a": "A"}, lambda items: {"a": 1}), {"a": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import time
+import unittest
+from address import DSTKAddressParser
+from address import dstk
+from address.dstk_server import DSTKServer
+
+GORHAM = "2722 Gorham St, Madison, WI 53703"
+
+
+class DSTKServerTest(unittest.TestCase):
+    def start(self, **kwargs):
+        self.server = DSTKServer(**kwargs).start()
+        self.addCleanup(self.server.stop)
+        self.client = dstk.DSTK({'apiBase': self.server.api_base})
+        self.addCleanup(self.client.close)
+
+    def test_street2coordinates(self):
+        self.start()
+        response = self.client.street2coordinates([GORHAM, "Nowhere"])
+        result = response[GORHAM]
+        self.assertEqual((result["street_number"], result["street_address"]), ("2722", "2722 Gorham St."))
+        self.assertEqual((result["locality"], result["region"], result["confidence"]), ("Madison", "WI", 0.9))
+        self.assertEqual(response["Nowhere"], None)
+        self.assertEqual(self.client.street2coordinates(GORHAM), {GORHAM: result})
+        self.assertEqual((self.server.requests, self.server.addresses), (2, 3))
+
+    def test_fixtures(self):
+        self.start(fixtures={GORHAM: None, "1 Fixture Rd": {"confidence": 0.5}})
+        response = self.client.street2coordinates([GORHAM, "1 FIXTURE RD"])
+        self.assertEqual(response, {GORHAM: None, "1 FIXTURE RD": {"confidence": 0.5}})
+
+    def test_parser(self):
+        self.start()
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.server.api_base)
+        addr = ap.parse_address(GORHAM)
+        self.assertEqual((addr.house_number, addr.street, addr.city), ("2722", "Gorham", "Madison"))
+        self.assertEqual(addr.geocode_precision, "street")
+        ap.dstk.close()
+
+    def test_errors(self):
+        self.start(error_rate=1)
+        ap = DSTKAddressParser(backend="dstk", dstk_api_base=self.server.api_base)
+        results = list(ap.dstk_parse_many([GORHAM] * 3 + ["1 Main St, Madison, WI"], chunk_size=2))
+        self.assertEqual([result.ok for result in results], [False] * 4)
+        self.assertEqual(self.server.errors, 2)
+        self.assertRaises(Exception, self.client._post, "/unknown", "[]")
+        ap.dstk.close()
+
+    def test_latency(self):
+        self.start(latency=0.05)
+        start = time.time()
+        self.client.street2coordinates(GORHAM)
+        self.assertTrue(time.time() - start >= 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
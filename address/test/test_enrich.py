@@ -0,0 +1,106 @@
+import unittest
+from address import AddressParser, ParsedAddress, ZipTable
+from address.enrich import PlaceIndex, city_key, enrich_address, enrich_many
+
+
+class CityKeyTest(unittest.TestCase):
+    def test_key(self):
+        self.assertEqual(city_key("Saint Paul"), "saint paul")
+        self.assertEqual(city_key("St. Paul"), "saint paul")
+        self.assertEqual(city_key(" FT  Myers "), "fort myers")
+
+
+class PlaceIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.zips = ZipTable([("53703", "Madison", "WI", "43.07", "-89.38", "-6", True),
+                              ("53704", "Madison", "WI", "43.12", "-89.35", "-6", True),
+                              ("55101", "Saint Paul", "MN", "44.95", "-93.09", "-6", True),
+                              ("35756", "Madison", "AL", "34.65", "-86.74", "-6", True)])
+        self.places = PlaceIndex(self.zips)
+
+    def test_zips_for(self):
+        self.assertEqual(self.places.zips_for("Madison", "WI"), ["53703", "53704"])
+        self.assertEqual(self.places.zips_for("madison", "al"), ["35756"])
+        self.assertEqual(self.places.zips_for("St. Paul", "MN"), ["55101"])
+        self.assertEqual(self.places.zips_for("Madison", "MN"), [])
+
+    def test_contains(self):
+        self.assertTrue(("Madison", "WI") in self.places)
+        self.assertFalse(("Chicago", "WI") in self.places)
+        self.assertEqual(len(self.places), 3)
+
+    def test_fill(self):
+        result = enrich_address(ParsedAddress(house_number="1", street="Main", zip="53704"), self.zips, self.places)
+        self.assertEqual((result.city, result.state), ("Madison", "WI"))
+        self.assertEqual(result.enriched, ("state", "city"))
+        self.assertEqual(result.zip_mismatch, ())
+
+    def test_mismatch(self):
+        result = enrich_address(ParsedAddress(city="Saint Paul", state="MN", zip="53703"), self.zips, self.places)
+        self.assertEqual(result.enriched, ())
+        self.assertEqual(result.zip_mismatch, ("state", "city"))
+
+    def test_unknown_zip(self):
+        result = enrich_address(ParsedAddress(zip="99999"), self.zips, self.places)
+        self.assertEqual(result.zip_mismatch, ("zip",))
+        self.assertEqual(result.city, None)
+
+    def test_no_zip(self):
+        result = enrich_address(ParsedAddress(city="Madison"), self.zips, self.places)
+        self.assertEqual((result.enriched, result.zip_mismatch), ((), ()))
+
+
+class ParserEnrichTest(unittest.TestCase):
+    def setUp(self):
+        self.ap = AddressParser(enrich=True)
+
+    def test_fill(self):
+        addr = self.ap.parse_address("2722 Gorham St 53703")
+        self.assertEqual(addr.city, "Madison")
+        self.assertEqual(addr.state, "WI")
+        self.assertEqual(addr.enriched, ("state", "city"))
+        self.assertEqual(addr.to_result().enriched, ("state", "city"))
+
+    def test_consistent(self):
+        addr = self.ap.parse_address("2722 Gorham St, Madison, WI 53703")
+        self.assertEqual(addr.enriched, ())
+        self.assertEqual(addr.zip_mismatch, ())
+
+    def test_mismatch(self):
+        addr = self.ap.parse_address("2722 Gorham St, Madison, IL 53703")
+        self.assertEqual(addr.zip_mismatch, ("state",))
+        addr = self.ap.parse_address("2722 Gorham St, Middleton, WI 53703")
+        self.assertEqual(addr.zip_mismatch, ("city",))
+
+    def test_off_by_default(self):
+        addr = AddressParser().parse_address("2722 Gorham St 53703")
+        self.assertEqual(addr.city, None)
+        self.assertEqual(addr.enriched, ())
+
+    def test_dict_zips(self):
+        zips = {"53703": {"zip": "53703", "city": "Madison", "state": "WI", "lat": "43.077535", "lng": "-89.38368",
+                          "timezone": "-6", "dst": True},
+                # The old load_zips kept the CSV header row too.
+                "zip": {"zip": "zip", "city": "city", "state": "state", "lat": "latitude", "lng": "longitude",
+                        "timezone": "timezone", "dst": False}}
+        ap = AddressParser(zips=zips, enrich=True, geocode=True)
+        self.assertEqual(len(ap.zips), 1)
+        self.assertTrue(isinstance(ap.zips, ZipTable))
+        addr = ap.parse_address("2722 Gorham St 53703")
+        self.assertEqual((addr.city, addr.state, addr.enriched), ("Madison", "WI", ("state", "city")))
+        self.assertEqual((addr.lat, addr.lng, addr.geocode_precision), (43.077535, -89.38368, "zip"))
+
+    def test_bad_zips(self):
+        self.assertRaises(ValueError, AddressParser, zips={"53703": {"city": "Madison"}})
+        self.assertRaises(TypeError, AddressParser, zips=[("53703", "Madison")])
+
+    def test_enrich_many(self):
+        ap = AddressParser()
+        results = list(enrich_many(ap.parse_many(["2722 Gorham St 53703", "not an address"], compact=True), ap))
+        self.assertEqual(results[0].address.city, "Madison")
+        self.assertEqual(results[0].address.enriched, ("state", "city"))
+        self.assertEqual(results[1].address, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
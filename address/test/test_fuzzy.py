@@ -0,0 +1,157 @@
+import unittest
+from address import Address, AddressParser, Gazetteer
+from address.address import InvalidAddressException
+from address.fuzzy import FuzzyIndex, edit_distance, deletes, prefix_length_for
+
+
+class EditDistanceTest(unittest.TestCase):
+    def test_distance(self):
+        self.assertEqual(edit_distance("mifflin", "mifflin"), 0)
+        self.assertEqual(edit_distance("mifflin", "miflin"), 1)
+        self.assertEqual(edit_distance("mifflin", "mfiflin"), 1)
+        self.assertEqual(edit_distance("mifflin", "mifflinn"), 1)
+        self.assertEqual(edit_distance("gorham", "goram st"), 4)
+        self.assertEqual(edit_distance("", "abc"), 3)
+
+    def test_max_distance(self):
+        self.assertEqual(edit_distance("gorham", "johnson", 2), 3)
+        self.assertEqual(edit_distance("a", "abcdef", 1), 2)
+        self.assertEqual(edit_distance("gorham", "goram", 2), 1)
+
+    def test_deletes(self):
+        self.assertEqual(deletes("abc", 1), set(["abc", "bc", "ac", "ab"]))
+        self.assertEqual(len(deletes("abc", 3)), 8)
+
+
+class FuzzyIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = FuzzyIndex(["mifflin", "gorham", "johnson", "e. johnson", "martin luther king jr"], 2)
+
+    def test_exact(self):
+        self.assertEqual(self.index.lookup("Gorham"), ("gorham", 0))
+        self.assertEqual(self.index.lookup("E Johnson"), ("e. johnson", 0))
+
+    def test_typos(self):
+        self.assertEqual(self.index.lookup("miflin"), ("mifflin", 1))
+        self.assertEqual(self.index.lookup("gohram"), ("gorham", 1))
+        self.assertEqual(self.index.lookup("martin luther kign jr"), ("martin luther king jr", 1))
+        self.assertEqual(self.index.lookup("goram", 0), (None, None))
+        self.assertEqual(self.index.lookup("dayton"), (None, None))
+
+    def test_short_queries(self):
+        index = FuzzyIndex(["wi", "ave", "park"], 2)
+        self.assertEqual(index.lookup("wy"), (None, None))
+        self.assertEqual(index.lookup("av"), (None, None))
+        self.assertEqual(index.lookup("prak"), ("park", 1))
+
+    def test_max_entries(self):
+        names = ["mifflin", "gorham", "johnson", "martin luther king jr"]
+        self.assertEqual(prefix_length_for(names, 2, 10 ** 6), 7)
+        self.assertEqual(prefix_length_for(names, 2, 60), 4)
+        self.assertEqual(prefix_length_for(names, 2, 1), 3)
+        index = FuzzyIndex(names, 2, max_entries=60)
+        self.assertEqual(index.prefix_length, 4)
+        self.assertTrue(len(index) <= 60)
+        self.assertEqual(index.lookup("johnsno"), ("johnson", 1))
+
+    def test_closest_wins(self):
+        self.assertEqual(self.index.lookup("e johnsen"), ("e. johnson", 1))
+        self.assertEqual(self.index.max_words, 4)
+
+
+class GazetteerFuzzyTest(unittest.TestCase):
+    def test_fuzzy_match_tail(self):
+        streets = Gazetteer(["mifflin", "martin luther king"])
+        words = ["123", "martin", "lutehr", "king"]
+        self.assertEqual(streets.match_tail(words, 3), (None, None))
+        self.assertEqual(streets.fuzzy_match_tail(words, 3, 0, 2), (1, "martin luther king", 1))
+        self.assertEqual(streets.fuzzy_match_tail(words, 3, 2, 2), (None, None, None))
+        self.assertEqual(streets.fuzzy_match_tail(["miflin"], 0), (0, "mifflin", 1))
+
+    def test_index_rebuilt(self):
+        streets = Gazetteer(["mifflin"])
+        streets.fuzzy_index(1)
+        streets.add("gorham")
+        self.assertEqual(streets.fuzzy_match_tail(["goram"], 0), (0, "gorham", 1))
+
+    def test_index_per_budget(self):
+        streets = Gazetteer(["mifflin", "gorham"])
+        small = streets.fuzzy_index(1, max_entries=10)
+        large = streets.fuzzy_index(1)
+        self.assertTrue(small is not large)
+        self.assertTrue(streets.fuzzy_index(1, max_entries=10) is small)
+        self.assertTrue(streets.fuzzy_index(1) is large)
+
+
+class ParserStreetTest(unittest.TestCase):
+    def setUp(self):
+        self.ap = AddressParser(streets=["mifflin", "martin luther king", "gorham"], fuzzy_streets=2)
+
+    def test_street_list_multi_word(self):
+        addr = self.ap.parse_address("123 Martin Luther King, Madison, WI 53703")
+        self.assertEqual(addr.house_number, "123")
+        self.assertEqual(addr.street, "Martin Luther King")
+        self.assertEqual(addr.fuzzy_matches, ())
+
+    def test_fuzzy_without_suffix(self):
+        addr = self.ap.parse_address("123 Martin Lutehr King, Madison, WI 53703")
+        self.assertEqual(addr.street, "Martin Luther King")
+        self.assertEqual(addr.fuzzy_matches, (("street", "Martin Lutehr King", "martin luther king", 1),))
+
+    def test_fuzzy_with_suffix(self):
+        addr = self.ap.parse_address("123 W. Miflin St., Madison, WI 53703")
+        self.assertEqual(addr.street, "Mifflin")
+        self.assertEqual(addr.street_prefix, "W.")
+        self.assertEqual(addr.street_suffix, "St.")
+        self.assertEqual(addr.fuzzy_matches, (("street", "Miflin", "mifflin", 1),))
+        self.assertEqual(addr.to_result().fuzzy_matches, addr.fuzzy_matches)
+
+    def test_off_by_default(self):
+        ap = AddressParser(streets=["mifflin"])
+        addr = ap.parse_address("123 W. Miflin St., Madison, WI 53703")
+        self.assertEqual(addr.street, "Miflin")
+        self.assertEqual(addr.fuzzy_matches, ())
+
+    def test_dstk_validation(self):
+        dstk_return = {'confidence': 0.9, 'street_address': '123 Miflin St', 'street_number': '123',
+                       'street_name': 'Miflin St', 'locality': 'Madison', 'region': 'WI'}
+        self.ap.backend = "dstk"
+        self.ap.required_confidence = 0.5
+        addr = Address("123 Miflin St, Madison, WI", self.ap, dstk_pre_parse=dstk_return)
+        self.assertEqual(addr.street, "Mifflin")
+        dstk_return = dict(dstk_return, street_address='123 Dayton St', street_name='Dayton St')
+        self.assertRaises(InvalidAddressException, Address, "123 Dayton St, Madison, WI", self.ap,
+                          dstk_pre_parse=dstk_return)
+
+
+class ParserCityTest(unittest.TestCase):
+    def setUp(self):
+        self.ap = AddressParser(cities=["madison", "milwaukee", "wisconsin dells"], fuzzy_cities=1)
+
+    def test_fuzzy_city(self):
+        addr = self.ap.parse_address("2 Park St., Madision, WI 53703")
+        self.assertEqual(addr.city, "Madison")
+        self.assertEqual(addr.state, "WI")
+        self.assertEqual(addr.fuzzy_matches, (("city", "madision", "madison", 1),))
+
+    def test_multi_word_city(self):
+        addr = self.ap.parse_address("2 Park St, Wisconsn Dells, WI")
+        self.assertEqual(addr.city, "Wisconsin Dells")
+        self.assertEqual(addr.fuzzy_matches, (("city", "wisconsn dells", "wisconsin dells", 1),))
+
+    def test_exact_first(self):
+        addr = self.ap.parse_address("2 Park St, Milwaukee, WI")
+        self.assertEqual(addr.city, "Milwaukee")
+        self.assertEqual(addr.fuzzy_matches, ())
+
+    def test_off_by_default(self):
+        addr = AddressParser(cities=["madison"]).parse_address("2 Park St., Madision, WI 53703")
+        self.assertEqual(addr.city, None)
+
+    def test_preload(self):
+        self.ap.preload()
+        self.assertEqual(self.ap.cities.fuzzy_index(1).max_distance, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from address import Gazetteer, AddressParser
+
+
+class GazetteerTest(unittest.TestCase):
+    def test_lowercases_names(self):
+        gazetteer = Gazetteer(["Madison ", "WISCONSIN RAPIDS"])
+        self.assertTrue("madison" in gazetteer)
+        self.assertTrue("wisconsin rapids" in gazetteer)
+        self.assertEqual(len(gazetteer), 2)
+
+    def test_append(self):
+        gazetteer = Gazetteer()
+        gazetteer.append("Madison")
+        gazetteer.append("")
+        self.assertEqual(list(gazetteer), ["madison"])
+
+    def test_lookup(self):
+        gazetteer = Gazetteer(["wisconsin rapids"])
+        self.assertEqual(gazetteer.lookup(["wisconsin", "rapids"]), "wisconsin rapids")
+        self.assertEqual(gazetteer.lookup(["rapids"]), None)
+
+    def test_lookup_aliases(self):
+        gazetteer = Gazetteer(["st. paul", "fort dodge", "mount airy"])
+        self.assertEqual(gazetteer.lookup(["saint", "paul"]), "st. paul")
+        self.assertEqual(gazetteer.lookup(["st", "paul"]), "st. paul")
+        self.assertEqual(gazetteer.lookup(["ft", "dodge"]), "fort dodge")
+        self.assertEqual(gazetteer.lookup(["mt", "airy"]), "mount airy")
+
+    def test_match_tail_longest(self):
+        gazetteer = Gazetteer(["francisco", "san francisco", "south san francisco"])
+        words = ["351", "king", "st", "san", "francisco"]
+        self.assertEqual(gazetteer.match_tail(words, 4), (3, "san francisco"))
+        self.assertEqual(gazetteer.match_tail(words, 4, start=4), (4, "francisco"))
+        self.assertEqual(gazetteer.match_tail(words, 2), (None, None))
+
+    def test_parser_cities_override(self):
+        ap = AddressParser(cities=["Madison"])
+        self.assertTrue(isinstance(ap.cities, Gazetteer))
+        self.assertTrue("madison" in ap.cities)
+        self.assertFalse("milwaukee" in ap.cities)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from address import AddressParser, ParsedAddress, ZipTable
+from address.enrich import PlaceIndex
+from address.geocode import geocode_address, geocode_many, zip_centroid
+
+
+class GeocodeTest(unittest.TestCase):
+    def setUp(self):
+        self.zips = ZipTable([("53703", "Madison", "WI", "43.0", "-89.0", "-6", True),
+                              ("53704", "Madison", "WI", "44.0", "-90.0", "-6", True),
+                              ("55101", "Saint Paul", "MN", "44.95", "-93.09", "-6", True)])
+        self.places = PlaceIndex(self.zips)
+
+    def test_zip_centroid(self):
+        self.assertEqual(zip_centroid(self.zips, "53703-1234"), (43.0, -89.0))
+        self.assertEqual(zip_centroid(self.zips, "99999"), None)
+
+    def test_city_centroid(self):
+        self.assertEqual(self.places.centroid("madison", "wi"), (43.5, -89.5))
+        self.assertEqual(self.places.centroid("St. Paul", "MN"), (44.95, -93.09))
+        self.assertEqual(self.places.centroid("Madison", "MN"), None)
+
+    def test_zip(self):
+        result = geocode_address(ParsedAddress(city="Saint Paul", state="MN", zip="53704"), self.zips, self.places)
+        self.assertEqual((result.lat, result.lng, result.geocode_precision), (44.0, -90.0, "zip"))
+
+    def test_city(self):
+        result = geocode_address(ParsedAddress(city="Madison", state="WI", zip="99999"), self.zips, self.places)
+        self.assertEqual((result.lat, result.lng, result.geocode_precision), (43.5, -89.5, "city"))
+
+    def test_not_found(self):
+        result = geocode_address(ParsedAddress(city="Madison"), self.zips, self.places)
+        self.assertEqual((result.lat, result.lng, result.geocode_precision), (None, None, None))
+
+    def test_keeps_street_coordinates(self):
+        result = ParsedAddress(zip="53703", lat=43.1, lng=-89.1, geocode_precision="street")
+        geocode_address(result, self.zips, self.places)
+        self.assertEqual((result.lat, result.lng, result.geocode_precision), (43.1, -89.1, "street"))
+
+
+class ParserGeocodeTest(unittest.TestCase):
+    def test_parse(self):
+        ap = AddressParser(geocode=True)
+        addr = ap.parse_address("2722 Gorham St, Madison, WI 53703")
+        self.assertEqual((addr.lat, addr.lng), ap.zips.coordinates(ap.zips.index("53703")))
+        self.assertEqual(addr.geocode_precision, "zip")
+        addr = ap.parse_address("2722 Gorham St, Madison, WI")
+        self.assertEqual((addr.lat, addr.lng), ap.place_index.centroid("Madison", "WI"))
+        self.assertEqual(addr.to_result().geocode_precision, "city")
+
+    def test_off_by_default(self):
+        addr = AddressParser().parse_address("2722 Gorham St, Madison, WI 53703")
+        self.assertEqual((addr.lat, addr.geocode_precision), (None, None))
+
+    def test_geocode_many(self):
+        ap = AddressParser()
+        results = list(geocode_many(ap.parse_many(["2722 Gorham St 53703", "not an address"], compact=True), ap))
+        self.assertEqual(results[0].address.geocode_precision, "zip")
+        self.assertEqual(results[1].address, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
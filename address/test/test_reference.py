@@ -0,0 +1,36 @@
+import unittest
+import os
+import tempfile
+from address import AddressParser
+from address import reference
+
+
+class ReferenceTest(unittest.TestCase):
+    def test_tables_shared_between_parsers(self):
+        first = AddressParser()
+        second = AddressParser()
+        self.assertTrue(first.cities is second.cities)
+        self.assertTrue(first.suffixes is second.suffixes)
+        self.assertTrue(first.streets is second.streets)
+
+    def test_shared_tables_read_only(self):
+        self.assertRaises(TypeError, reference.suffixes().__setitem__, "FOO", "BAR")
+        self.assertRaises(TypeError, reference.cities().add, "foo")
+
+    def test_overrides_layered_on_copy(self):
+        fd, filename = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write("Nowheresville\n")
+        try:
+            ap = AddressParser()
+            ap.load_cities(filename)
+        finally:
+            os.remove(filename)
+        self.assertTrue("nowheresville" in ap.cities)
+        self.assertTrue("madison" in ap.cities)
+        self.assertFalse("nowheresville" in reference.cities())
+        self.assertFalse(ap.cities is AddressParser().cities)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import pickle
+import unittest
+from address import Address, AddressParser, ParsedAddress
+
+
+class ParsedAddressTest(unittest.TestCase):
+    def setUp(self):
+        self.ap = AddressParser()
+
+    def test_defaults(self):
+        result = ParsedAddress(house_number="2", street="Park")
+        self.assertEqual(result.city, None)
+        self.assertEqual(result.confidence, -1)
+        self.assertFalse(result.unmatched)
+        self.assertEqual(result.line_number, -1)
+        self.assertRaises(TypeError, ParsedAddress, sidewalk="north")
+
+    def test_no_dict(self):
+        result = ParsedAddress()
+        self.assertFalse(hasattr(result, '__dict__'))
+        self.assertRaises(AttributeError, setattr, result, 'parser', self.ap)
+
+    def test_to_result(self):
+        addr = self.ap.parse_address("2 N. Park Street Apt 2, Madison, WI 53703", line_number=7)
+        result = addr.to_result()
+        self.assertEqual(result.house_number, "2")
+        self.assertEqual(result.street_prefix, "N.")
+        self.assertEqual(result.street, "Park")
+        self.assertEqual(result.street_suffix, "St.")
+        self.assertEqual(result.apartment, "Apt 2")
+        self.assertEqual(result.city, "Madison")
+        self.assertEqual(result.state, "WI")
+        self.assertEqual(result.zip, "53703")
+        self.assertEqual(result.line_number, 7)
+        self.assertEqual(result.full_address(), addr.full_address())
+
+    def test_from_result(self):
+        result = self.ap.parse_address("2 N. Park Street, Madison, WI 53703").to_result()
+        addr = Address.from_result(result, self.ap)
+        self.assertTrue(addr.parser is self.ap)
+        self.assertEqual(addr.full_address(), result.full_address())
+        self.assertEqual(addr.zip_info(addr.zip)["city"], "Madison")
+        self.assertEqual(addr.to_result(), result)
+
+    def test_pickle(self):
+        addr = self.ap.parse_address("2 N. Park Street, Madison, WI 53703")
+        result = addr.to_result()
+        copy = pickle.loads(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy, result)
+        self.assertTrue(len(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)) <
+                        len(pickle.dumps(addr, pickle.HIGHEST_PROTOCOL)))
+
+
+if __name__ == '__main__':
+    unittest.main()
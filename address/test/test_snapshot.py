@@ -0,0 +1,103 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+import time
+from address import Gazetteer, ZipTable
+from address import snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "reference.snapshot")
+        self.tables = {
+            'suffixes': {"STREET": "ST"},
+            'cities': Gazetteer(["madison", "wisconsin rapids", "st. paul"]),
+            'streets': ["mifflin"],
+            'zips': ZipTable([("53703", "Madison", "WI", "43.077535", "-89.38368", "-6", True)]),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        snapshot.build(self.tables, self.path)
+        loaded = snapshot.Snapshot(self.path)
+        self.assertEqual(loaded.load('suffixes'), {"STREET": "ST"})
+        self.assertEqual(loaded.load('streets'), ["mifflin"])
+        cities = loaded.load('cities')
+        self.assertEqual(cities.lookup(["saint", "paul"]), "st. paul")
+        self.assertEqual(cities.match_tail(["wisconsin", "rapids"], 1), (0, "wisconsin rapids"))
+        self.assertEqual(loaded.load('zips')["53703"]["lat"], 43.077535)
+
+    def test_stale_when_source_newer(self):
+        source_dir = os.path.join(self.dir, "source")
+        os.mkdir(source_dir)
+        snapshot.build(self.tables, self.path)
+        self.assertFalse(snapshot.is_stale(self.path, source_dir))
+        source = os.path.join(source_dir, "cities.csv")
+        with open(source, 'w') as f:
+            f.write("madison\n")
+        later = time.time() + 10
+        os.utime(source, (later, later))
+        self.assertTrue(snapshot.is_stale(self.path, source_dir))
+
+    def test_rejects_other_format(self):
+        with open(self.path, 'wb') as f:
+            f.write("not a snapshot")
+        self.assertRaises(ValueError, snapshot.Snapshot, self.path)
+
+    def test_open_rebuilds_bad_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write("not a snapshot")
+        loaded = snapshot.open_snapshot(lambda: self.tables, self.path)
+        self.assertEqual(loaded.load('streets'), ["mifflin"])
+
+    def test_default_path(self):
+        saved = dict((name, os.environ.get(name)) for name in ('PYADDRESS_SNAPSHOT', 'XDG_CACHE_HOME'))
+
+        def restore():
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        self.addCleanup(restore)
+        os.environ.pop('PYADDRESS_SNAPSHOT', None)
+        os.environ['XDG_CACHE_HOME'] = self.dir
+        path = snapshot.default_path()
+        self.assertEqual(os.path.dirname(path), os.path.join(self.dir, "pyaddress"))
+        self.assertFalse(path.startswith(snapshot.cwd))
+        os.environ['PYADDRESS_SNAPSHOT'] = self.path
+        self.assertEqual(snapshot.default_path(), self.path)
+        os.environ['PYADDRESS_SNAPSHOT'] = ""
+        self.assertEqual(snapshot.default_path(), None)
+
+    def test_build_creates_directory(self):
+        path = os.path.join(self.dir, "cache", "pyaddress", "reference.snapshot")
+        snapshot.build(self.tables, path)
+        self.assertEqual(snapshot.Snapshot(path).load('streets'), ["mifflin"])
+
+    def test_unwritable_path_is_logged(self):
+        blocker = os.path.join(self.dir, "file")
+        with open(blocker, 'w') as f:
+            f.write("")
+        messages = []
+
+        class Handler(logging.Handler):
+            def emit(self, record):
+                messages.append(record.getMessage())
+        handler = Handler()
+        snapshot.logger.addHandler(handler)
+        self.addCleanup(snapshot.logger.removeHandler, handler)
+        self.assertEqual(snapshot.open_snapshot(lambda: self.tables, os.path.join(blocker, "reference.snapshot")),
+                         None)
+        self.assertEqual(len(messages), 1)
+        self.assertTrue("reading the CSVs instead" in messages[0])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from address import tokenizer
+from address.tokenizer import Token, tokenize, NUMERIC, ZIP, HOUSE_NUMBER, ALPHA, ALNUM, UNIT_MARKER
+
+
+class TokenizerTest(unittest.TestCase):
+    def test_case_variants(self):
+        token = Token("mAdison")
+        self.assertEqual((token.text, token.lower, token.upper, token.capitalized),
+                         ("mAdison", "madison", "MADISON", "Madison"))
+
+    def test_kinds(self):
+        self.assertEqual(Token("53703").kind, NUMERIC | ZIP | HOUSE_NUMBER)
+        self.assertEqual(Token("53703-1234").kind, ZIP | HOUSE_NUMBER)
+        self.assertEqual(Token("123").kind, NUMERIC | HOUSE_NUMBER)
+        self.assertEqual(Token("12-14").kind, HOUSE_NUMBER)
+        self.assertEqual(Token("1/2").kind, HOUSE_NUMBER)
+        self.assertEqual(Token("1st").kind, ALNUM)
+        self.assertEqual(Token("b2").kind, ALNUM)
+        self.assertEqual(Token("Park").kind, ALPHA)
+        self.assertEqual(Token("APT").kind, ALPHA | UNIT_MARKER)
+        self.assertEqual(Token("#4").kind, 0)
+        self.assertEqual(Token("").kind, 0)
+
+    def test_tokenize(self):
+        tokens, segment_starts = tokenize(["2 N Park St", " Madison", " WI 53703"])
+        self.assertEqual([token.text for token in tokens], ["2", "N", "Park", "St", "Madison", "WI", "53703"])
+        self.assertEqual(segment_starts, [0, 0, 0, 0, 4, 5, 5])
+
+    def test_cache(self):
+        self.assertTrue(tokenizer.make_token("Park") is tokenizer.make_token("Park"))
+        self.assertTrue(tokenizer.as_token("Park") is tokenizer.make_token("Park"))
+        token = Token("Park")
+        self.assertTrue(tokenizer.as_token(token) is token)
+
+
+if __name__ == '__main__':
+    unittest.main()
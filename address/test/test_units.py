@@ -0,0 +1,33 @@
+import unittest
+from address import UnitExtractor, extract_unit
+
+
+class UnitExtractorTest(unittest.TestCase):
+    def test_no_unit(self):
+        self.assertEqual(extract_unit("2 N. Park Street, Madison, WI 53703"),
+                         ("2 N. Park Street, Madison, WI 53703", None))
+
+    def test_hash_unit(self):
+        self.assertEqual(extract_unit("407 West Doty St. # 2"), ("407 West Doty St. ", "#2"))
+
+    def test_apt_unit(self):
+        self.assertEqual(extract_unit("123 Main St Apt 4B, Madison, WI"), ("123 Main St , Madison, WI", "Apt 4B"))
+
+    def test_unit_count_dropped(self):
+        self.assertEqual(extract_unit("123 Main St --3 units"), ("123 Main St ", None))
+
+    def test_later_regex_wins(self):
+        # "#5" is removed first, then "Unit 7" matches a later regex and replaces it.
+        address, unit = extract_unit("12 Elm St #5 Unit 7")
+        self.assertEqual(unit, "Unit 7")
+        self.assertEqual(address, "12 Elm St  ")
+
+    def test_is_unit_token(self):
+        extractor = UnitExtractor()
+        self.assertTrue(extractor.is_unit_token("#12"))
+        self.assertTrue(extractor.is_unit_token("APT"))
+        self.assertTrue(extractor.is_unit_token("12/14"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from address import ZipTable
+
+
+class ZipTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = ZipTable([
+            ("53703", "Madison", "WI", "43.077535", "-89.38368", "-6", True),
+            ("00210", "Portsmouth", "NH", "43.005895", "-71.013202", "-5", True),
+            ("85001", "Phoenix", "AZ", "33.703967", "-112.351835", "-7", False),
+        ])
+
+    def test_lookup(self):
+        info = self.table["53703"]
+        self.assertEqual(info, {"zip": "53703", "city": "Madison", "state": "WI", "lat": 43.077535,
+                                "lng": -89.38368, "timezone": -6, "dst": True})
+
+    def test_leading_zero(self):
+        self.assertEqual(self.table.get("00210")["zip"], "00210")
+        self.assertEqual(list(self.table), ["00210", "53703", "85001"])
+
+    def test_nine_digit_zip(self):
+        self.assertEqual(self.table.get("53703-1234")["city"], "Madison")
+
+    def test_short_zip(self):
+        self.assertEqual(self.table.index("5370"), -1)
+        self.assertFalse("0210" in self.table)
+        self.assertEqual(self.table.get("210"), None)
+
+    def test_malformed_zip_plus_four(self):
+        self.assertTrue("53703-1234" in self.table)
+        self.assertFalse("53703-12" in self.table)
+        self.assertFalse("537031234" in self.table)
+        self.assertFalse("53703abc" in self.table)
+        self.assertFalse("53703-1234\n" in self.table)
+
+    def test_missing(self):
+        self.assertEqual(self.table.get("99999"), None)
+        self.assertEqual(self.table.get("abcde"), None)
+        self.assertFalse("53704" in self.table)
+        self.assertRaises(KeyError, self.table.__getitem__, "53704")
+
+    def test_duplicate_zip_last_wins(self):
+        table = ZipTable([
+            ("53703", "Madison", "WI", "43.077535", "-89.38368", "-6", True),
+            ("00210", "Portsmouth", "NH", "43.005895", "-71.013202", "-5", True),
+            ("53703", "Monona", "WI", "43.077535", "-89.38368", "-6", True),
+        ])
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table["53703"]["city"], "Monona")
+
+    def test_dst(self):
+        self.assertEqual(self.table["85001"]["dst"], False)
+
+
+if __name__ == '__main__':
+    unittest.main()
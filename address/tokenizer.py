@@ -0,0 +1,114 @@
+# Tokenizer for Address.parse_address. Each token is classified once, when it is made, with its case variants and a
+# bit set describing its shape, so the check chain can test a flag instead of calling lower() or running a regex in
+# every check. Address feeds reuse the same words over and over ("St", "Apt", "Madison", "WI"), so tokens are
+# cached by their text.
+
+import re
+
+# Token kinds, combined as bit flags.
+# Only digits.
+NUMERIC = 1
+# Starts with a 5 digit zip, with or without the +4.
+ZIP = 2
+# A house number: digits, optionally followed by a dash or slash and more digits. E.g. 123, 12-14 or 1/2.
+HOUSE_NUMBER = 4
+# Only letters.
+ALPHA = 8
+# Only letters and digits, with at least one of each.
+ALNUM = 16
+# A word that introduces an apartment number, "apt" or "apartment".
+UNIT_MARKER = 32
+
+zip_regex = re.compile(r"\d{5}(-?\d{0,4})?")
+# Keep lowercase, no periods
+# Requires numbers first, then option dash plus numbers.
+street_num_regex = re.compile(r'^(\d+)([-/]?)(\d*)$')
+
+UNIT_MARKERS = frozenset(['apt', 'apartment'])
+
+# Tokens by text. Cleared when it grows past _CACHE_SIZE, which keeps it bounded without any bookkeeping per hit.
+_cache = {}
+_CACHE_SIZE = 50000
+
+
+class Token(object):
+    """
+    One word of an address, with its lower, upper and capitalized forms and its kind flags. Tokens are shared through
+    the cache, so they must not be changed.
+    """
+    __slots__ = ('text', 'lower', 'upper', 'capitalized', 'kind')
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self.upper = text.upper()
+        self.capitalized = text.capitalize()
+        self.kind = classify(text, self.lower)
+
+    def __len__(self):
+        return len(self.text)
+
+    def __repr__(self):
+        return "Token({0!r})".format(self.text)
+
+
+def classify(text, lower=None):
+    """
+    Return the kind flags of a token. The regexes only run on tokens that start with a digit.
+    """
+    kind = 0
+    if not text:
+        return kind
+    if text[0].isdigit():
+        if text.isdigit():
+            kind |= NUMERIC
+        elif text.isalnum():
+            kind |= ALNUM
+        if zip_regex.match(text):
+            kind |= ZIP
+        if street_num_regex.match(text):
+            kind |= HOUSE_NUMBER
+    elif text.isalpha():
+        kind |= ALPHA
+        if (lower or text.lower()) in UNIT_MARKERS:
+            kind |= UNIT_MARKER
+    elif text.isalnum():
+        kind |= ALNUM
+    return kind
+
+
+def make_token(text):
+    """
+    Return the Token for text, from the cache if it has been seen before.
+    """
+    token = _cache.get(text)
+    if token is None:
+        if len(_cache) >= _CACHE_SIZE:
+            _cache.clear()
+        token = _cache[text] = Token(text)
+    return token
+
+
+def as_token(token):
+    """
+    Accept either a Token or a plain string, so the Address check methods can still be called with strings.
+    """
+    if token.__class__ is Token:
+        return token
+    return make_token(token)
+
+
+def tokenize(segments):
+    """
+    Split comma separated segments of an address into tokens. Returns a tuple of (tokens, segment_starts), where
+    segment_starts[i] is the index of the first token in the same segment as token i, so multi word cities aren't
+    matched across a comma.
+    """
+    tokens = []
+    segment_starts = []
+    for segment in segments:
+        start = len(tokens)
+        for text in segment.split():
+            tokens.append(make_token(text))
+            segment_starts.append(start)
+    return tokens, segment_starts
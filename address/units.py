@@ -0,0 +1,71 @@
+# Apartment and unit extraction. Every address goes through this before tokenizing, so the regexes are compiled once
+# and a single combined search rules out the common case of an address with no unit at all.
+
+import re
+
+# Sure match regexes, in priority order. Each one that matches is removed from the address, and the last match wins
+# as the apartment.
+APARTMENT_REGEXES = [r'#\w+ & \w+', r'#\w+ rm \w+', r'#\w+-\w', r'apt #{0,1}\w+', r'apartment #{0,1}\w+', r'#\w+',
+                     r'# \w+', r'rm \w+', r'unit #?\w+', r'units #?\w+', r'- #{0,1}\w+', r'no\s?\d+\w*',
+                     r'style\s\w{1,2}', r'townhouse style\s\w{1,2}']
+
+# Looser regexes for single leftover tokens, which are only tried once everything else has been ruled out.
+APARTMENT_TOKEN_REGEXES = [r'#\w+ & \w+', r'#\w+ rm \w+', r'#\w+-\w', r'apt #{0,1}\w+', r'apartment #{0,1}\w+',
+                           r'#\w+', r'# \w+', r'rm \w+', r'unit #?\w+', r'units #?\w+', r'- #{0,1}\w+',
+                           r'no\s?\d+\w*', r'style\s\w{1,2}', r'\d{1,4}/\d{1,4}', r'\d{1,4}', r'\w{1,2}']
+
+# Things like '2 units' or '--3 units' shouldn't be in an address anyway. They are dropped, not saved.
+UNIT_COUNT_REGEX = r'-?-?\w+ units'
+
+
+class UnitExtractor(object):
+    """
+    Finds and removes the apartment or unit part of an address. The regexes are compiled once, when the extractor
+    is created, and shared by every address parsed with it.
+    """
+
+    def __init__(self, regexes=APARTMENT_REGEXES, token_regexes=APARTMENT_TOKEN_REGEXES):
+        self.patterns = [re.compile(regex, re.IGNORECASE) for regex in regexes]
+        # One alternation of every regex. If this doesn't match, none of them do.
+        self.any_pattern = re.compile('|'.join('(?:%s)' % regex for regex in regexes), re.IGNORECASE)
+        # re.match is anchored, so for single tokens it doesn't matter which alternative matches.
+        self.token_pattern = re.compile('|'.join('(?:%s)' % regex for regex in token_regexes), re.IGNORECASE)
+        self.unit_count_pattern = re.compile(UNIT_COUNT_REGEX, re.IGNORECASE)
+
+    def extract(self, address):
+        """
+        Returns a tuple of (address, unit), where address has the unit removed and unit is the matched apartment
+        text, or None if there isn't one. E.g. "407 West Doty St. #2" gives ("407 West Doty St. ", "#2").
+        """
+        # Run some basic cleaning
+        address = address.replace("# ", "#")
+        address = address.replace(" & ", "&")
+        address = self.unit_count_pattern.sub("", address)
+        if self.any_pattern.search(address) is None:
+            return address, None
+        unit = None
+        for pattern in self.patterns:
+            match = pattern.search(address)
+            if match:
+                unit = match.group()
+                # None of the regexes look behind, so only the rest of the string needs rescanning.
+                start = match.start()
+                address = address[:start] + pattern.sub("", address[start:])
+        return address, unit
+
+    def is_unit_token(self, token):
+        """
+        Returns True if a single token looks like it could be an apartment or unit number.
+        """
+        return self.token_pattern.match(token) is not None
+
+
+default_extractor = UnitExtractor()
+
+
+def extract_unit(address):
+    """
+    Split the apartment or unit out of an address string using the default extractor. Returns a tuple of (address,
+    unit), unit being None if the address has no apartment.
+    """
+    return default_extractor.extract(address)
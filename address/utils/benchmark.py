@@ -0,0 +1,267 @@
+# Benchmarks for the default backend, to run before and after a change. Corpora are generated from zipcodes.csv with
+# a seed, so the same seed always gives the same addresses. Measured:
+#
+#   parse.<shape>     parse_address throughput in addresses per second, for each address shape in SHAPES
+#   preprocess        preprocess_address alone, addresses per second
+#   construct.cold    seconds for the first AddressParser() in a fresh interpreter, reference tables included. Much
+#                     faster when the reference snapshot is already in the cache directory, see snapshot.py
+#   construct.warm    microseconds for another AddressParser() once the shared tables are loaded
+#   load_zips         seconds for load_zips of zipcodes.csv, in a fresh interpreter
+#   load_cities       seconds for load_cities of cities.csv, in a fresh interpreter
+#   memory.<step>     peak resident memory in kilobytes after construct, load_zips, load_cities and parse, each in
+#                     a fresh interpreter
+#
+# Results are written as JSON with --output. Given a --baseline written the same way, every metric that got worse by
+# more than --threshold is reported as a regression and the exit status is 1.
+#
+#   python address/utils/benchmark.py --output before.json
+#   python address/utils/benchmark.py --baseline before.json --threshold 0.1
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import timeit
+
+cwd = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.dirname(cwd))
+
+from address import AddressParser
+from address.address import Address, InvalidAddressException
+from address import reference
+from address import snapshot
+
+SHAPES = ("full", "no_suffix", "unit", "multi_word_city")
+STEPS = ("construct", "load_zips", "load_cities", "parse")
+STREETS = [("Main", "St"), ("Oak", "Ave"), ("Park", "Rd"), ("Gorham", "St"), ("Washington", "Blvd"), ("Lake", "Dr"),
+           ("Mill", "Ln"), ("Elm", "Ct"), ("Cedar", "Way"), ("Mifflin", "St")]
+PREFIXES = ["", "", "", "N ", "S ", "E ", "W "]
+UNITS = ["Apt 4", "Apt 12B", "#3", "Unit 7", "Suite 200", "Ste 110"]
+timer = timeit.default_timer
+
+
+def corpus(shape, size, seed=0):
+    """
+    size addresses of one shape in random zips from zipcodes.csv, the same ones for the same shape and seed:
+
+      full             "123 N Main St, Madison, WI 53703"
+      no_suffix        "123 Main, Madison, WI 53703"
+      unit             "123 Main St Apt 4, Madison, WI 53703"
+      multi_word_city  "123 Main St, Salt Lake City, UT 84101"
+    """
+    rng = random.Random(seed * len(SHAPES) + SHAPES.index(shape))
+    zips = reference.zips()
+    multi_word = shape == "multi_word_city"
+    rows = [i for i in range(len(zips)) if (" " in zips.place(i)[0]) == multi_word]
+    addresses = []
+    for i in range(size):
+        row = zips.row(rng.choice(rows))
+        street, suffix = rng.choice(STREETS)
+        street = rng.choice(PREFIXES) + street
+        if shape == "no_suffix":
+            line = "{0} {1}".format(rng.randint(1, 9999), street)
+        elif shape == "unit":
+            line = "{0} {1} {2} {3}".format(rng.randint(1, 9999), street, suffix, rng.choice(UNITS))
+        else:
+            line = "{0} {1} {2}".format(rng.randint(1, 9999), street, suffix)
+        addresses.append("{0}, {1}, {2} {3}".format(line, row["city"], row["state"], row["zip"]))
+    return addresses
+
+
+def metric(value, unit, better):
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def format_value(value, unit):
+    return "{0:,.4f}".format(value) if unit == "s" else "{0:,.1f}".format(value)
+
+
+def throughput(function, addresses, repeat):
+    """
+    The best addresses per second of repeat passes of function over addresses. Invalid addresses count too, they
+    are part of the work a parser does.
+    """
+    best = None
+    for i in range(repeat):
+        start = timer()
+        for address in addresses:
+            try:
+                function(address)
+            except InvalidAddressException:
+                pass
+        elapsed = timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(addresses) / best if best else 0
+
+
+def bench_parse(corpora, repeat):
+    # No parse cache, so every pass parses every address.
+    ap = AddressParser()
+    results = {}
+    for shape in SHAPES:
+        results["parse." + shape] = metric(throughput(ap.parse_address, corpora[shape], repeat), "addresses/s",
+                                           "higher")
+    address = Address(None, ap)
+    every = [line for shape in SHAPES for line in corpora[shape]]
+    results["preprocess"] = metric(throughput(address.preprocess_address, every, repeat), "addresses/s", "higher")
+    return results
+
+
+def bench_construct(repeat, count=100):
+    # A construction takes microseconds, so each run times count of them for a steadier average.
+    AddressParser()
+    best = None
+    for i in range(repeat):
+        start = timer()
+        for j in range(count):
+            AddressParser()
+        elapsed = (timer() - start) / count
+        best = elapsed if best is None else min(best, elapsed)
+    return {"construct.warm": metric(best * 1000000, "us", "lower")}
+
+
+def measure(step, size, seed):
+    """
+    Run one step in this interpreter and print its seconds and the peak resident memory in kilobytes as JSON. Called
+    in a fresh interpreter for each step, so nothing else is loaded yet.
+    """
+    start = timer()
+    ap = AddressParser()
+    seconds = timer() - start
+    if step == "load_zips":
+        start = timer()
+        ap.load_zips(os.path.join(cwd, "zipcodes.csv"))
+        seconds = timer() - start
+    elif step == "load_cities":
+        start = timer()
+        ap.load_cities(os.path.join(cwd, "cities.csv"))
+        seconds = timer() - start
+    elif step == "parse":
+        for shape in SHAPES:
+            for address in corpus(shape, size, seed):
+                try:
+                    ap.parse_address(address)
+                except InvalidAddressException:
+                    pass
+    # ru_maxrss is in kilobytes on Linux
+    print json.dumps({"seconds": seconds, "peak_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss})
+
+
+def bench_fresh(size, seed, repeat):
+    """
+    The steps that need a fresh interpreter, each run repeat times, keeping the fastest time and the lowest peak.
+    """
+    results = {}
+    for step in STEPS:
+        runs = []
+        for i in range(repeat):
+            output = subprocess.check_output([sys.executable, os.path.realpath(__file__), "--measure", step,
+                                              "--size", str(size), "--seed", str(seed)])
+            runs.append(json.loads(output))
+        name = "construct.cold" if step == "construct" else step
+        if step != "parse":
+            results[name] = metric(min(run["seconds"] for run in runs), "s", "lower")
+        results["memory." + step] = metric(min(run["peak_kb"] for run in runs), "kB", "lower")
+    return results
+
+
+def run(size=2000, seed=0, repeat=3):
+    """
+    Run every benchmark and return the results, a dict with the settings and a "metrics" dict of name to value,
+    unit and whether higher or lower is better.
+    """
+    # The first cold construction builds the snapshot if it is missing, the fastest run is kept either way.
+    path = snapshot.default_path()
+    had_snapshot = path is not None and os.path.exists(path)
+    corpora = dict((shape, corpus(shape, size, seed)) for shape in SHAPES)
+    metrics = {}
+    metrics.update(bench_parse(corpora, repeat))
+    metrics.update(bench_construct(repeat))
+    metrics.update(bench_fresh(size, seed, repeat))
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "size": size,
+        "seed": seed,
+        "repeat": repeat,
+        "snapshot": had_snapshot,
+        "metrics": metrics,
+    }
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compare results with baseline results, returning (name, baseline value, value, change, regressed) for each metric
+    in both with the same unit. change is the fraction the metric got better by, negative when it got worse, and
+    regressed is True when it got worse by more than threshold.
+    """
+    comparison = []
+    for name in sorted(results["metrics"]):
+        if name not in baseline["metrics"] or baseline["metrics"][name]["unit"] != results["metrics"][name]["unit"]:
+            continue
+        new = results["metrics"][name]
+        old = baseline["metrics"][name]["value"]
+        if not old:
+            continue
+        change = (new["value"] - old) / float(old)
+        if new["better"] == "lower":
+            change = -change
+        comparison.append((name, old, new["value"], change, change < -threshold))
+    return comparison
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark parsing, preprocessing and loading reference data.")
+    parser.add_argument("--size", type=int, default=2000, help="Addresses in each shape's corpus.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpora.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each benchmark, the best one is kept.")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare with results in this JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Fraction a metric may get worse by before it is a regression.")
+    parser.add_argument("--measure", choices=STEPS, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.measure:
+        measure(args.measure, args.size, args.seed)
+        return 0
+    results = run(args.size, args.seed, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if results["snapshot"]:
+        print "construct.cold read the reference snapshot that was already in the cache directory."
+    else:
+        print "construct.cold had no reference snapshot to start with, the fastest run may have used the one it built."
+    if not args.baseline:
+        for name, result in sorted(results["metrics"].items()):
+            print "{0:<24} {1:>14} {2}".format(name, format_value(result["value"], result["unit"]), result["unit"])
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if (baseline.get("size"), baseline.get("seed")) != (args.size, args.seed):
+        sys.stderr.write("Baseline was run with a different --size or --seed, throughput may not compare.\n")
+    if baseline.get("snapshot") != results["snapshot"]:
+        sys.stderr.write("Baseline was run {0} a reference snapshot, construct.cold may not compare.\n".format(
+            "with" if baseline.get("snapshot") else "without"))
+    regressions = 0
+    print "{0:<24} {1:>14} {2:>14} {3:>8}".format("metric", "baseline", "current", "change")
+    for name, old, new, change, regressed in compare(results, baseline, args.threshold):
+        regressions += regressed
+        unit = results["metrics"][name]["unit"]
+        print "{0:<24} {1:>14} {2:>14} {3:>+8.1%}{4}".format(name, format_value(old, unit), format_value(new, unit),
+                                                            change, "  REGRESSION" if regressed else "")
+    if regressions:
+        print "{0} regression(s) worse than {1:.0%}".format(regressions, args.threshold)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
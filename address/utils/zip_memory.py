@@ -0,0 +1,47 @@
+# Compares the memory used by zipcodes.csv loaded as a dict of dicts (the layout used up to 0.1.2) with the array
+# backed ZipTable. Each layout is loaded in a fresh interpreter so the numbers don't include each other.
+import os
+import resource
+import subprocess
+import sys
+
+cwd = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.dirname(cwd))
+
+
+def load_dicts(filename):
+    zips = {}
+    with open(filename, 'r') as zipfile:
+        for line in zipfile:
+            if line.strip() == "":
+                continue
+            members = line.replace('"', '').replace('\n', '').split(',')
+            zips[members[0]] = {"zip": members[0], "city": members[1], "state": members[2], "lat": members[3],
+                                "lng": members[4], "timezone": members[5], "dst": members[6] == "1"}
+    return zips
+
+
+def measure(layout):
+    from address.zipcodes import ZipTable
+    filename = os.path.join(cwd, "zipcodes.csv")
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if layout == "dict":
+        table = load_dicts(filename)
+    else:
+        table = ZipTable.read(filename)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux
+    print (after - before) * 1024
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 2:
+        measure(sys.argv[1])
+        sys.exit(0)
+    results = {}
+    for layout in ("dict", "compact"):
+        output = subprocess.check_output([sys.executable, os.path.realpath(__file__), layout])
+        results[layout] = int(output.strip())
+    print "dict of dicts: {0:>12,} bytes".format(results["dict"])
+    print "ZipTable:      {0:>12,} bytes".format(results["compact"])
+    print "Saved {0:.1%}".format(1 - float(results["compact"]) / results["dict"])
@@ -0,0 +1,202 @@
+# Compact storage for zipcodes.csv. Keeping 43k rows as dicts of strings costs tens of megabytes per process, so the
+# table is stored as parallel typed arrays sorted by zip, and rows are found with a binary search.
+
+import array
+import bisect
+import re
+
+# A zip as a string: five digits, optionally with the +4.
+zip_regex = re.compile(r"(\d{5})(?:-\d{4})?\Z")
+
+
+class ZipTable(object):
+    """
+    A read-only, column oriented zip code table. Zips are stored as ints, latitude and longitude as int32
+    microdegrees (the same size as float32, but exact for the six decimal places in zipcodes.csv), timezone as a
+    signed byte and dst as a byte. City and state names are stored once and referenced by index.
+
+    Supports enough of the dict interface to stand in for the old dict of dicts: table["53703"] and table.get()
+    return a dict with zip, city, state, lat, lng, timezone and dst keys, and `"53703" in table`, len() and iteration
+    over zip strings work.
+    """
+    _columns = ('_zips', '_lat', '_lng', '_timezone', '_dst', '_city', '_state')
+
+    def __init__(self, rows=()):
+        """
+        rows is an iterable of (zip, city, state, lat, lng, timezone, dst) tuples, in any order.
+        """
+        self.cities = []
+        self.states = []
+        self._zips = array.array('i')
+        self._lat = array.array('i')
+        self._lng = array.array('i')
+        self._timezone = array.array('b')
+        self._dst = array.array('b')
+        self._city = array.array('I')
+        self._state = array.array('B')
+        city_index = {}
+        state_index = {}
+        in_order = True
+        for zip_, city, state, lat, lng, timezone, dst in rows:
+            zip_code = int(zip_)
+            if self._zips and zip_code <= self._zips[-1]:
+                in_order = False
+            if city not in city_index:
+                city_index[city] = len(self.cities)
+                self.cities.append(city)
+            if state not in state_index:
+                state_index[state] = len(self.states)
+                self.states.append(state)
+            self._zips.append(zip_code)
+            self._lat.append(int(round(float(lat) * 1000000)))
+            self._lng.append(int(round(float(lng) * 1000000)))
+            self._timezone.append(int(timezone))
+            self._dst.append(1 if dst else 0)
+            self._city.append(city_index[city])
+            self._state.append(state_index[state])
+        if not in_order:
+            self._sort()
+
+    def _sort(self):
+        """
+        Sort the columns by zip for binary searching. Later rows for the same zip replace earlier ones, like they did
+        when the table was a dict.
+        """
+        # sorted() is stable, so the last row for each zip is the last one in its run.
+        order = sorted(range(len(self._zips)), key=self._zips.__getitem__)
+        keep = [i for n, i in enumerate(order)
+                if n + 1 == len(order) or self._zips[order[n + 1]] != self._zips[i]]
+        for name in self._columns:
+            column = getattr(self, name)
+            setattr(self, name, array.array(column.typecode, [column[i] for i in keep]))
+
+    @classmethod
+    def read(cls, filename):
+        """
+        Build a table from a zipcodes.csv style file. The header row and blank lines are skipped.
+        """
+        def rows():
+            with open(filename, 'r') as zipfile:
+                for line in zipfile:
+                    if line.strip() == "":
+                        continue
+                    members = line.replace('"', '').strip().split(',')
+                    # Skip the header
+                    if not members[0].isdigit():
+                        continue
+                    yield (members[0], members[1], members[2], members[3], members[4], members[5],
+                           members[6] == "1")
+        return cls(rows())
+
+    @classmethod
+    def from_dict(cls, zips):
+        """
+        Build a table from a dict of zip to a dict with city, state, lat and lng keys, and optionally timezone and
+        dst, the layout of the zip table up to 0.1.2. Keys that aren't zips are skipped, like the header row that
+        layout kept under "zip". Raises ValueError if an entry is missing one of the required keys.
+        """
+        def rows():
+            for zip_code, info in zips.items():
+                if not str(zip_code).isdigit():
+                    continue
+                try:
+                    yield (zip_code, info["city"], info["state"], info["lat"], info["lng"], info.get("timezone", 0),
+                           info.get("dst", False))
+                except (KeyError, TypeError):
+                    raise ValueError("Zip {0} needs a dict with city, state, lat and lng keys.".format(zip_code))
+        return cls(rows())
+
+    def get_state(self):
+        """
+        The table as plain strings and lists that marshal can store, for the reference snapshot. Arrays are stored as
+        their raw machine bytes.
+        """
+        columns = {}
+        for name in self._columns:
+            column = getattr(self, name)
+            columns[name] = (column.typecode, column.tostring())
+        return {'cities': self.cities, 'states': self.states, 'columns': columns}
+
+    @classmethod
+    def from_state(cls, state):
+        table = cls()
+        table.cities = state['cities']
+        table.states = state['states']
+        for name, (typecode, data) in state['columns'].items():
+            column = array.array(typecode)
+            column.fromstring(data)
+            setattr(table, name, column)
+        return table
+
+    def index(self, zip_code):
+        """
+        Return the row number of a zip, given as a string or int, or -1 if it isn't in the table. A string zip must be
+        five digits, optionally followed by -dddd, which is ignored.
+        """
+        if not isinstance(zip_code, (int, long)):
+            match = zip_regex.match(zip_code)
+            if match is None:
+                return -1
+            zip_code = int(match.group(1))
+        i = bisect.bisect_left(self._zips, zip_code)
+        if i < len(self._zips) and self._zips[i] == zip_code:
+            return i
+        return -1
+
+    def row(self, i):
+        """
+        The dict view of row i.
+        """
+        return {
+            "zip": "%05d" % self._zips[i],
+            "city": self.cities[self._city[i]],
+            "state": self.states[self._state[i]],
+            "lat": self._lat[i] / 1000000.0,
+            "lng": self._lng[i] / 1000000.0,
+            "timezone": self._timezone[i],
+            "dst": self._dst[i] == 1,
+        }
+
+    def place(self, i):
+        """
+        The (city, state) of row i, without building the whole row.
+        """
+        return self.cities[self._city[i]], self.states[self._state[i]]
+
+    def coordinates(self, i):
+        """
+        The (lat, lng) of row i, as floats.
+        """
+        return self._lat[i] / 1000000.0, self._lng[i] / 1000000.0
+
+    def places(self):
+        """
+        Iterate over (zip, city index, state index) for every row, with the zip as an int. For building indexes over
+        the table.
+        """
+        return zip(self._zips, self._city, self._state)
+
+    def get(self, zip_code, default=None):
+        i = self.index(zip_code)
+        if i < 0:
+            return default
+        return self.row(i)
+
+    def __getitem__(self, zip_code):
+        i = self.index(zip_code)
+        if i < 0:
+            raise KeyError(zip_code)
+        return self.row(i)
+
+    def __contains__(self, zip_code):
+        return self.index(zip_code) >= 0
+
+    def __len__(self):
+        return len(self._zips)
+
+    def __iter__(self):
+        for zip_code in self._zips:
+            yield "%05d" % zip_code
+
+    def keys(self):
+        return list(self)